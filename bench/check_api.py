@@ -0,0 +1,147 @@
+"""Behaviour checks that need the real server: boots uvicorn main:app against bench/fake_ollama.py
+and a seeded synthetic vault (same setup as run_bench.py), runs each check and exits non-zero
+if any of them fails.
+
+    python bench/check_api.py --checks disconnect,cors
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+from fake_ollama import FAIL_MARKER
+from run_bench import BENCH_PASSWORD, BENCH_PHONE, REPO_ROOT, seed_vault, start_process, wait_ready
+
+
+class CheckFailed(Exception):
+    pass
+
+
+# --- 🔌 CLIENT DISCONNECT ABORTS OLLAMA ---
+async def check_disconnect(client, ollama, token, args):
+    """Closing an SSE stream after a few tokens must abort the Ollama request, and the LLM slot
+    must stay taken until that abort has happened."""
+    auth = {"Authorization": f"Bearer {token}"}
+    payload = {"query": "Explain the law on criminal intimidation (disconnect check)", "language": "en"}
+    before = (await ollama.get("/bench/stats")).json()  # warm-up already made its own call
+    received = 0
+    async with client.stream("POST", "/api/chat/stream", json=payload, headers=auth) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("event: ") and line != "event: token":
+                raise CheckFailed(f"expected tokens, got {line!r}")
+            if line == "event: token":
+                received += 1
+                if received == args.disconnect_after:
+                    break
+        in_flight = (await client.get("/api/stats")).json()["llm_queue"]["in_flight"]
+        if in_flight != 1:
+            raise CheckFailed(f"llm_queue in_flight is {in_flight} while streaming, expected 1")
+
+    deadline = time.monotonic() + args.abort_timeout
+    while time.monotonic() < deadline:
+        # App first, then Ollama: a free slot must never be seen before the upstream abort.
+        in_flight = (await client.get("/api/stats")).json()["llm_queue"]["in_flight"]
+        upstream = {key: value - before[key] for key, value in (await ollama.get("/bench/stats")).json().items()}
+        if upstream["completed"]:
+            raise CheckFailed(f"fake Ollama finished the whole answer after the client left: {upstream}")
+        if in_flight == 0 and not upstream["aborted"]:
+            raise CheckFailed("LLM slot was released while Ollama was still generating")
+        if in_flight == 0:
+            return {"tokens_before_disconnect": received, "ollama": upstream}
+        await asyncio.sleep(0.05)
+    raise CheckFailed(f"no upstream abort within {args.abort_timeout}s: in_flight={in_flight}, ollama={upstream}")
+
+
+# --- 🌐 CORS ON MIDDLEWARE-RENDERED ERRORS ---
+async def check_cors(client, ollama, token, args):
+    """A 5xx rendered by TelemetryMiddleware (Ollama failing mid-RAG) must still carry
+    Access-Control-Allow-Origin, or the cross-origin index.html cannot read the error body."""
+    origin = "http://localhost:5500"
+    response = await client.post("/api/chat", headers={"Authorization": f"Bearer {token}", "Origin": origin},
+                                 json={"query": f"Explain the law on criminal intimidation {FAIL_MARKER}", "language": "en"})
+    body = response.json()
+    if response.status_code < 500 or body.get("error") != "llm_error":
+        raise CheckFailed(f"expected a middleware-rendered llm_error, got {response.status_code} {body}")
+    allowed = response.headers.get("access-control-allow-origin")
+    if allowed not in (origin, "*"):
+        raise CheckFailed(f"{response.status_code} {body['error']} has access-control-allow-origin={allowed!r}")
+    return {"status": response.status_code, "error": body["error"], "allow_origin": allowed}
+
+
+CHECKS = {"disconnect": check_disconnect, "cors": check_cors}
+
+
+async def run_checks(args, base_url, ollama_url):
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client, \
+            httpx.AsyncClient(base_url=ollama_url, timeout=args.timeout) as ollama:
+        await wait_ready(client, args.ready_timeout)
+        await client.post("/api/signup", json={
+            "phone": BENCH_PHONE, "password": BENCH_PASSWORD, "first_name": "Bench", "last_name": "User",
+            "email": "bench@judicial.ai", "dob": "2000-01-01", "location": "India"})
+        token = (await client.post("/api/login", json={"phone": BENCH_PHONE, "password": BENCH_PASSWORD})).json()["access_token"]
+
+        results, failed = {}, False
+        for name in args.checks:
+            try:
+                results[name] = {"ok": True, **await CHECKS[name](client, ollama, token, args)}
+            except CheckFailed as e:
+                results[name], failed = {"ok": False, "reason": str(e)}, True
+            print(f"{'✅' if results[name]['ok'] else '❌'} {name}", file=sys.stderr)
+        return results, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end behaviour checks for Judicial AI.")
+    parser.add_argument("--checks", default=",".join(CHECKS), help="comma-separated checks to run")
+    parser.add_argument("--app-port", type=int, default=8766)
+    parser.add_argument("--ollama-port", type=int, default=11501)
+    parser.add_argument("--tokens", type=int, default=400, help="fake Ollama tokens per answer (long, so it can be cut off)")
+    parser.add_argument("--token-ms", type=float, default=20.0, help="fake Ollama per-token delay")
+    parser.add_argument("--disconnect-after", type=int, default=5, help="tokens read before closing the stream")
+    parser.add_argument("--abort-timeout", type=float, default=3.0)
+    parser.add_argument("--vault-chunks", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+    args.checks = args.checks.split(",")
+
+    workdir = tempfile.mkdtemp(prefix="judicial-check-")
+    vault_dir = os.path.join(workdir, "vectorstore")
+    seed_vault(vault_dir, args.vault_chunks)
+    env = dict(os.environ,
+               JUDICIAL_VAULT_DIR=vault_dir,
+               PYTHONPATH=os.path.join(REPO_ROOT, "src"),
+               OLLAMA_BASE_URL=f"http://127.0.0.1:{args.ollama_port}",
+               JUDICIAL_FAKE_EMBEDDINGS="1",
+               USERS_DB=os.path.join(workdir, "users.db"),
+               ANSWER_CACHE_DB=os.path.join(workdir, "answer_cache.db"),
+               ANSWER_CACHE_MAX_ENTRIES="0")
+
+    ollama = start_process([sys.executable, "bench/fake_ollama.py", "--port", str(args.ollama_port),
+                            "--token-ms", str(args.token_ms), "--tokens", str(args.tokens)],
+                           env, os.path.join(workdir, "fake_ollama.log"))
+    app = start_process([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+                         "--log-level", "warning"], env, os.path.join(workdir, "app.log"))
+    try:
+        results, failed = asyncio.run(run_checks(args, f"http://127.0.0.1:{args.app_port}",
+                                                 f"http://127.0.0.1:{args.ollama_port}"))
+    finally:
+        for proc in (app, ollama):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if failed:
+        print(f"Logs kept in {workdir}", file=sys.stderr)
+        sys.exit(1)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Deterministic stand-in for the Ollama HTTP API, so benchmarks run offline and repeatably.
+
+Implements just what ChatOllama uses: POST /api/chat (streaming NDJSON or one JSON body).
+Every reply is the same fixed token sequence with a fixed prefill delay and per-token delay.
+GET /bench/stats counts streams that ran to the end vs. were dropped by the client mid-answer.
+A prompt containing FAIL_MARKER gets Ollama's 500 error body instead (error-path checks).
+
+    python bench/fake_ollama.py --port 11500 --prefill-ms 40 --token-ms 8 --tokens 48
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+ANSWER_WORDS = ("Under the cited provision of BNS 2023 the offence is punishable with imprisonment "
+                "and fine as stated in the context provided .").split()
+FAIL_MARKER = "[fake-ollama:fail]"
+
+
+def create_app(prefill_ms: float, token_ms: float, tokens: int) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+    pieces = [(ANSWER_WORDS[i % len(ANSWER_WORDS)] + " ") for i in range(tokens)]
+    stream_stats = {"started": 0, "completed": 0, "aborted": 0}
+
+    def frame(model, content, done, prompt_chars=0, started_ns=0):
+        body = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            body.update({
+                "done_reason": "stop",
+                "total_duration": time.perf_counter_ns() - started_ns,
+                "load_duration": 0,
+                "prompt_eval_count": prompt_chars // 4,
+                "prompt_eval_duration": int(prefill_ms * 1e6),
+                "eval_count": len(pieces),
+                "eval_duration": int(token_ms * len(pieces) * 1e6),
+            })
+        return body
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        payload = await request.json()
+        model = payload.get("model", "llama3")
+        num_predict = (payload.get("options") or {}).get("num_predict") or len(pieces)
+        limit = pieces[:max(1, min(num_predict, len(pieces)))]
+        prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+        started_ns = time.perf_counter_ns()
+        if any(FAIL_MARKER in m.get("content", "") for m in payload.get("messages", [])):
+            return JSONResponse({"error": "model runner has unexpectedly stopped"}, status_code=500)
+
+        if not payload.get("stream", True):
+            await asyncio.sleep((prefill_ms + token_ms * len(limit)) / 1000)
+            return JSONResponse(frame(model, "".join(limit), True, prompt_chars, started_ns))
+
+        async def ndjson():
+            stream_stats["started"] += 1
+            sent = 0
+            try:
+                await asyncio.sleep(prefill_ms / 1000)
+                for piece in limit:
+                    await asyncio.sleep(token_ms / 1000)
+                    yield json.dumps(frame(model, piece, False)) + "\n"
+                    sent += 1
+                yield json.dumps(frame(model, "", True, prompt_chars, started_ns)) + "\n"
+                stream_stats["completed"] += 1
+                print(f"COMPLETED after {sent} tokens", flush=True)
+            except (asyncio.CancelledError, GeneratorExit):
+                stream_stats["aborted"] += 1
+                print(f"ABORTED after {sent} tokens", flush=True)
+                raise
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    @app.get("/bench/stats")
+    async def bench_stats():
+        return stream_stats
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "llama3:latest", "model": "llama3:latest"}]}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--prefill-ms", type=float, default=40.0)
+    parser.add_argument("--token-ms", type=float, default=8.0)
+    parser.add_argument("--tokens", type=int, default=48)
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.prefill_ms, args.token_ms, args.tokens), host="127.0.0.1", port=args.port,
+                log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Reproducible load + latency benchmark for the Judicial AI API.
+
+Boots the real app (uvicorn main:app) against local stand-ins -- bench/fake_ollama.py for
+llama3, a fixed-vector embedder instead of MiniLM and a seeded synthetic vault -- then
+drives /api/login, fast-track /api/chat, RAG /api/chat and RAG /api/chat/stream at each
+concurrency level.
+Output is sorted JSON, so runs from two commits can simply be diffed.
+
+    python bench/run_bench.py --concurrency 1,8,32 --requests 200 --out bench/results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_PHONE, BENCH_PASSWORD = "9000000001", "bench-password"
+
+# Fixed query sets -> same routing decisions on every run.
+FAST_QUERIES = [
+    "What is the punishment for theft?",
+    "Someone murdered my neighbour",
+    "My friend was kidnapped",
+    "Hit and run case near my house",
+    "He posted defamatory content about me",
+    "I was cheated in an online scam",
+]
+RAG_QUERIES = [
+    "What are the rights of an arrested person?",
+    "Explain the law on criminal intimidation",
+    "What is the punishment for forgery of documents?",
+    "When does the right of private defence extend to causing death?",
+    "What constitutes a public nuisance?",
+    "Explain dowry death provisions",
+]
+
+
+# --- 🏛️ SYNTHETIC VAULT ---
+def seed_vault(vault_dir, chunks):
+    """Deterministic stand-in statute corpus, embedded with the same fixed-vector embedder the app uses."""
+    import chromadb
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    sys.path.insert(0, os.path.join(REPO_ROOT, "src"))
+    from models import EMBEDDING_DIM
+    from vault import COLLECTION_NAME
+
+    texts, metadatas = [], []
+    for i in range(chunks):
+        section = 100 + i // 2
+        texts.append(f"{section}. Whoever commits offence number {section} shall be punished with imprisonment "
+                     f"for a term which may extend to {1 + i % 10} years, or with fine, or with both. "
+                     + "Explanation.-- the words of this section have the meaning assigned in the general clauses. " * 6)
+        metadatas.append({"source": "bench.pdf", "act": "BNS 2023", "unit": "Section", "page": 1 + i // 4,
+                          "seq": i, "section": str(section), "sections": f",{section},"})
+    embedder = DeterministicFakeEmbedding(size=EMBEDDING_DIM)
+    collection = chromadb.PersistentClient(path=vault_dir).get_or_create_collection(COLLECTION_NAME)
+    collection.upsert(ids=[f"bench-{i}" for i in range(chunks)], documents=texts, metadatas=metadatas,
+                      embeddings=embedder.embed_documents(texts))
+
+
+# --- 📏 STATS ---
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # nearest-rank percentile
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return round(sorted_values[rank], 2)
+
+
+def summarize(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": round(sum(values) / len(values), 2),
+        "max": round(values[-1], 2),
+    }
+
+
+# --- 🚀 PROCESSES ---
+def start_process(args, env, log_path):
+    log = open(log_path, "w")
+    return subprocess.Popen(args, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_ready(client, timeout_s):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"app not ready after {timeout_s}s")
+
+
+# --- 🎯 SCENARIOS ---
+def parse_server_timing(header):
+    """'embed;dur=1.2, chroma;dur=3.4' -> {"server.embed": 1.2, "server.chroma": 3.4}"""
+    stages = {}
+    for entry in filter(None, (part.strip() for part in (header or "").split(","))):
+        name, _, params = entry.partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                stages[f"server.{name.strip()}"] = float(value)
+    return stages
+
+
+async def call_json(client, path, payload, headers=None):
+    """(status, {stage: ms}) measuring time-to-headers and total time, plus the server's own stages."""
+    started = time.perf_counter()
+    async with client.stream("POST", path, json=payload, headers=headers) as response:
+        ttfb = time.perf_counter() - started
+        await response.aread()
+    total = time.perf_counter() - started
+    stages = parse_server_timing(response.headers.get("server-timing"))
+    stages.update({"ttfb_ms": 1000 * ttfb, "total_ms": 1000 * total})
+    return response.status_code, stages
+
+
+async def call_sse(client, path, payload, headers):
+    """(status, {stage: ms}) adding time-to-first-token for the SSE endpoint."""
+    started = time.perf_counter()
+    stages = {}
+    async with client.stream("POST", path, json=payload, headers=headers) as response:
+        stages["ttfb_ms"] = 1000 * (time.perf_counter() - started)
+        stages.update(parse_server_timing(response.headers.get("server-timing")))
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+                if "ttft_ms" not in stages and event in ("token", "answer"):
+                    stages["ttft_ms"] = 1000 * (time.perf_counter() - started)
+            elif event == "done" and line.startswith("data:"):
+                # Stages that ran after the headers were sent arrive in the final event.
+                for name, ms in json.loads(line[5:]).get("server_timing", {}).items():
+                    stages[f"server.{name}"] = ms
+    stages["total_ms"] = 1000 * (time.perf_counter() - started)
+    return response.status_code, stages
+
+
+def scenario_calls(name, token):
+    auth = {"Authorization": f"Bearer {token}"}
+    if name == "login":
+        return lambda client, i: call_json(client, "/api/login", {"phone": BENCH_PHONE, "password": BENCH_PASSWORD})
+    if name == "chat_fast":
+        return lambda client, i: call_json(client, "/api/chat", {
+            "query": FAST_QUERIES[i % len(FAST_QUERIES)], "language": "en"}, auth)
+    if name == "chat_rag":
+        # Numbered suffix keeps every query distinct, so nothing is served from the answer cache.
+        return lambda client, i: call_json(client, "/api/chat", {
+            "query": f"{RAG_QUERIES[i % len(RAG_QUERIES)]} (case {i})", "language": "en"}, auth)
+    if name == "chat_rag_stream":
+        return lambda client, i: call_sse(client, "/api/chat/stream", {
+            "query": f"{RAG_QUERIES[i % len(RAG_QUERIES)]} (case {i})", "language": "en"}, auth)
+    raise ValueError(name)
+
+
+async def run_scenario(client, call, requests, concurrency, warmup):
+    for i in range(warmup):
+        await call(client, -1 - i)
+
+    next_index = 0
+    statuses, stages = {}, {}
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            try:
+                status, timings = await call(client, i)
+            except httpx.HTTPError as e:
+                status, timings = type(e).__name__, {}
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            for stage, ms in timings.items():
+                stages.setdefault(stage, []).append(ms)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - started
+
+    ok = statuses.get("200", 0)
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "status_counts": statuses,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(ok / wall_s, 2) if wall_s else None,
+        "latency_ms": summarize(stages.get("total_ms", [])),
+        "stages_ms": {stage: summarize(values) for stage, values in stages.items() if stage != "total_ms"},
+    }
+
+
+async def bench(args, base_url):
+    limits = httpx.Limits(max_connections=max(args.concurrency) + 8)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, args.ready_timeout)
+        await client.post("/api/signup", json={
+            "phone": BENCH_PHONE, "password": BENCH_PASSWORD, "first_name": "Bench", "last_name": "User",
+            "email": "bench@judicial.ai", "dob": "2000-01-01", "location": "India"})
+        token = (await client.post("/api/login", json={"phone": BENCH_PHONE, "password": BENCH_PASSWORD})).json()["access_token"]
+
+        results = {}
+        for name in args.scenarios:
+            call = scenario_calls(name, token)
+            for concurrency in args.concurrency:
+                print(f"⏱️  {name} @ {concurrency} concurrent ...", file=sys.stderr)
+                results[f"{name}@c{concurrency}"] = await run_scenario(client, call, args.requests, concurrency, args.warmup)
+        return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline, repeatable latency/throughput benchmark for Judicial AI.")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--warmup", type=int, default=5, help="unrecorded requests before each run")
+    parser.add_argument("--scenarios", default="login,chat_fast,chat_rag,chat_rag_stream")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--prefill-ms", type=float, default=40.0, help="fake Ollama prompt-processing delay")
+    parser.add_argument("--token-ms", type=float, default=8.0, help="fake Ollama per-token delay")
+    parser.add_argument("--tokens", type=int, default=48, help="fake Ollama tokens per answer")
+    parser.add_argument("--vault-chunks", type=int, default=400, help="synthetic statute chunks to seed")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--out", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.scenarios = args.scenarios.split(",")
+
+    workdir = tempfile.mkdtemp(prefix="judicial-bench-")
+    vault_dir = os.path.join(workdir, "vectorstore")
+    seed_vault(vault_dir, args.vault_chunks)
+    env = dict(os.environ,
+               JUDICIAL_VAULT_DIR=vault_dir,
+               PYTHONPATH=os.path.join(REPO_ROOT, "src"),
+               OLLAMA_BASE_URL=f"http://127.0.0.1:{args.ollama_port}",
+               JUDICIAL_FAKE_EMBEDDINGS="1",
+               USERS_DB=os.path.join(workdir, "users.db"),
+               ANSWER_CACHE_DB=os.path.join(workdir, "answer_cache.db"),
+               ANSWER_CACHE_MAX_ENTRIES="0")
+
+    ollama = start_process([sys.executable, "bench/fake_ollama.py", "--port", str(args.ollama_port),
+                            "--prefill-ms", str(args.prefill_ms), "--token-ms", str(args.token_ms),
+                            "--tokens", str(args.tokens)], env, os.path.join(workdir, "fake_ollama.log"))
+    app = start_process([sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+                         "--log-level", "warning"], env, os.path.join(workdir, "app.log"))
+    try:
+        results = asyncio.run(bench(args, f"http://127.0.0.1:{args.app_port}"))
+    finally:
+        for proc in (app, ollama):
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "requests": args.requests,
+            "vault_chunks": args.vault_chunks,
+            "retrieval_backend": os.getenv("RETRIEVAL_BACKEND", "chroma"),
+            "fake_ollama": {"prefill_ms": args.prefill_ms, "token_ms": args.token_ms, "tokens": args.tokens},
+            "logs": workdir,
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"✅ Benchmark written to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
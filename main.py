@@ -1,26 +1,38 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import jwt
+import json
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from pypdf import PdfReader
 
-# --- AI & LANGCHAIN IMPORTS ---
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_ollama import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
+# --- AI & LANGCHAIN IMPORTS (heavy model libraries load lazily in models.py) ---
 from langchain_core.output_parsers import StrOutputParser
 
 # --- DATABASE IMPORTS ---
 try:
-    from database import (register_user, check_login, 
+    from database import (register_user_async, authenticate_async,
                           get_full_user_details, update_user_profile,
                           check_user_exists, reset_password, update_profile_picture)
 except ImportError:
     print("❌ Error: database.py file missing.")
 
+import telemetry
+from llm_gate import LLMGate, QueueFull
+from answer_cache import SemanticAnswerCache
+from intent_router import IntentRouter
+from session_docs import SessionDocStore, DocumentNotFound, pdf_to_chunks
+from models import ModelManager, ModelsNotReady
+from prompting import RAG_PROMPT, rag_inputs
+
 # --- 🔐 SECURITY SETUP ---
 SECRET_KEY = "RETRO_X_SUPER_SECRET_KEY_DO_NOT_SHARE"
 ALGORITHM = "HS256"
@@ -47,40 +59,134 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid Token")
 
-app = FastAPI(title="Judicial AI Pro | Team Retro X")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up runs in a background thread, so the server starts accepting (and 503-ing) at once.
+    models.start_warm_up()
+    yield
+
+app = FastAPI(title="Judicial AI Pro | Team Retro X", lifespan=lifespan)
+
+# Unhandled errors -> classified JSON instead of a bare 500.
+ERROR_RESPONSES = {
+    "llm_unreachable": (503, "Local AI engine is offline. Please try again shortly."),
+    "llm_error": (502, "Local AI engine could not answer. Please try again."),
+    "timeout": (504, "Judicial AI took too long to answer. Please try again."),
+    "vault_error": (503, "Law database is unavailable right now. Please try again."),
+}
 
+def unhandled_error_response(error: str):
+    status_code, message = ERROR_RESPONSES.get(error, (500, "Local System Overload. Please try again."))
+    return JSONResponse(status_code=status_code, content={"status": "error", "error": error, "response": message})
+
+# Per-stage timings -> Server-Timing header + /metrics. It also renders unhandled errors itself:
+# an @app.exception_handler(Exception) would run outside it and skip the 5xx counts.
+app.add_middleware(telemetry.TelemetryMiddleware, error_response=unhandled_error_response)
+# Added last = outermost, so the 5xx bodies rendered above also carry CORS headers
+# (index.html is cross-origin and could not read them otherwise).
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], 
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# --- 🚦 LLM CONCURRENCY LIMITS (one local Ollama behind all workers) ---
+llm_gate = LLMGate(
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "2")),
+    max_queue=int(os.getenv("LLM_MAX_QUEUE", "16")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+)
+
+@app.exception_handler(QueueFull)
+async def queue_full_handler(request: Request, exc: QueueFull):
+    telemetry.ERRORS.inc("QueueFull")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"status": "error", "response": "Judicial AI is busy. Please retry shortly.", "retry_after": exc.retry_after},
+    )
+
+# --- 🧊 SEMANTIC ANSWER CACHE (RAG fallback answers survive restarts) ---
+answer_cache = SemanticAnswerCache(
+    db_path=os.getenv("ANSWER_CACHE_DB", "answer_cache.db"),
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+    ttl_s=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000")),
+    max_bytes=int(float(os.getenv("ANSWER_CACHE_MAX_MB", "32")) * 1024 * 1024),
+)
+
+# --- 📎 UPLOADED DOCUMENTS (per-user, in-memory, bounded) ---
+UPLOAD_MAX_BYTES = int(float(os.getenv("UPLOAD_MAX_MB", "20")) * 1024 * 1024)
+UPLOAD_MAX_PAGES = int(os.getenv("UPLOAD_MAX_PAGES", "300"))
+UPLOAD_MAX_CHUNKS = int(os.getenv("UPLOAD_MAX_CHUNKS", "2000"))
+# Upload embedding (up to UPLOAD_MAX_CHUNKS texts) runs on its own small pool, not the default
+# executor the DB calls share; uploads past UPLOAD_MAX_PENDING get 503 + Retry-After, so extracted
+# text and vectors in memory stay bounded across users, not just per request.
+UPLOAD_EMBED_WORKERS = int(os.getenv("UPLOAD_EMBED_WORKERS", "1"))
+UPLOAD_MAX_PENDING = int(os.getenv("UPLOAD_MAX_PENDING", "4"))
+_upload_embed_pool = ThreadPoolExecutor(max_workers=UPLOAD_EMBED_WORKERS, thread_name_prefix="upload-embed")
+_uploads_pending = 0
+session_docs = SessionDocStore(
+    max_docs_per_user=int(os.getenv("SESSION_DOCS_PER_USER", "3")),
+    max_bytes=int(float(os.getenv("SESSION_DOCS_MAX_MB", "256")) * 1024 * 1024),
+    idle_ttl_s=float(os.getenv("SESSION_DOC_IDLE_TTL", "1800")),
 )
 
+@app.exception_handler(DocumentNotFound)
+async def document_not_found_handler(request: Request, exc: DocumentNotFound):
+    telemetry.ERRORS.inc("DocumentNotFound")
+    return JSONResponse(status_code=404, content={"status": "error", "response": "Document expired or not found. Please upload it again."})
+
+# --- 🎯 INTENT ROUTER (keywords compiled once from src/intents.json) ---
+intent_router = IntentRouter()
+REJECT_RESPONSE = intent_router.responses["reject"]
+
 # --- 100% OFFLINE AI SETUP (ENGLISH ONLY) ---
-try:
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vector_db = Chroma(persist_directory="src/vectorstore", embedding_function=embeddings, collection_name="judicial_vault")
-    # Strictly Local Llama 3 (Runs fastest in English)
-    llm = ChatOllama(model="llama3", temperature=0.1) 
-    print("✅ Fast Offline AI Core Loaded! (English Mode)")
-except Exception as e:
-    print(f"⚠️ AI Error: {e}")
+# Nothing heavy is built at import; the models warm up in the background after startup.
+models = ModelManager()
+
+# Optional 2nd routing stage: classify against intent centroids before falling back to RAG.
+if float(os.getenv("INTENT_SEMANTIC_THRESHOLD", "0")) > 0:
+    models.extra_steps.append(("intent_centroids", lambda: intent_router.build_centroids(
+        models.embeddings.embed_documents, float(os.environ["INTENT_SEMANTIC_THRESHOLD"]))))
+
+@app.exception_handler(ModelsNotReady)
+async def models_not_ready_handler(request: Request, exc: ModelsNotReady):
+    telemetry.ERRORS.inc("ModelsNotReady")
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "5"},
+        content={"status": "error", "response": "Judicial AI is still warming up. Please retry shortly.", "retry_after": 5},
+    )
+
+# --- 🩺 HEALTH PROBES ---
+@app.get("/health/live")
+def health_live():
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def health_ready():
+    if not models.ready:
+        return JSONResponse(status_code=503, content=models.status())
+    return models.status()
 
 class LoginRequest(BaseModel): phone: str; password: str
 class SignupRequest(BaseModel): phone: str; password: str; first_name: str; last_name: str; email: str; dob: str; location: str
-class ChatRequest(BaseModel): query: str; language: str; pdf_text: str = ""
+class ChatRequest(BaseModel): query: str; language: str; pdf_text: str = ""; doc_id: str = ""
 
 @app.post("/api/login")
-def login(req: LoginRequest):
-    user_data = check_login(req.phone, req.password)
-    if user_data:
-        full_info = get_full_user_details(req.phone)
-        fname = full_info[3] if full_info and len(full_info) > 3 else user_data[0]
-        lname = full_info[4] if full_info and len(full_info) > 4 else "Agent"
-        email = full_info[5] if full_info and len(full_info) > 5 else "user@judicial.ai"
-        dob = full_info[6] if full_info and len(full_info) > 6 else "2000-01-01"
-        loc = full_info[7] if full_info and len(full_info) > 7 else "India"
+async def login(req: LoginRequest):
+    # One query for credentials + profile; bcrypt verify runs on its own bounded pool.
+    user = await authenticate_async(req.phone, req.password)
+    if user:
+        fname = user["first_name"] or "Agent"
+        lname = user["last_name"] or "Agent"
+        email = user["email"] or "user@judicial.ai"
+        dob = user["dob"] or "2000-01-01"
+        loc = user["location"] or "India"
 
         access_token = create_access_token(data={"sub": req.phone})
         return {"status": "success", "user": fname, "lname": lname, "phone": req.phone, "email": email, "dob": dob, "location": loc, "access_token": access_token}
@@ -88,64 +194,267 @@ def login(req: LoginRequest):
         raise HTTPException(status_code=401, detail="Invalid Credentials!")
 
 @app.post("/api/signup")
-def signup(req: SignupRequest):
-    success = register_user(req.phone, req.password, req.first_name, req.last_name, req.email, req.dob, req.location)
+async def signup(req: SignupRequest):
+    success = await register_user_async(req.phone, req.password, req.first_name, req.last_name, req.email, req.dob, req.location)
     if success: return {"status": "success", "message": "Account created!"}
     else: raise HTTPException(status_code=400, detail="User already exists!")
 
 
+# 🔥 1. FAST-TRACK INTENTS (English Only)
+def match_fast_track(query: str):
+    """Returns the canned BNS answer if a keyword intent matches, or None if it needs RAG."""
+    with telemetry.span("intent"):
+        intent = intent_router.match(query)
+    return intent_router.responses[intent] if intent else None
+
+async def instant_answer(query: str):
+    """Canned intent answer, else a bare section lookup once the vault index is warm. No LLM either way."""
+    answer = match_fast_track(query)
+    if answer is not None:
+        telemetry.CHAT_ROUTES.inc("fast_track")
+    elif models.ready:
+        with telemetry.span("section_lookup"):
+            # Threadpool: after a re-ingest the lookup may first rebuild the vault snapshot.
+            answer = await run_in_threadpool(models.retriever.direct_answer, query)
+        if answer is not None:
+            telemetry.CHAT_ROUTES.inc("section_lookup")
+    return answer
+
+# 🧠 3. THE PURE LOCAL RAG CHAIN (For Out of Syllabus Queries)
+def build_rag_chain(query: str, docs):
+    """Precompiled prompt (stable system prefix) + budgeted context -> (chain, inputs)."""
+    with telemetry.span("context"):
+        inputs = rag_inputs(query, docs)
+    # No output parser in the chain: the raw message carries Ollama's prefill/generation timings.
+    return RAG_PROMPT | models.llm, inputs
+
+async def invoke_llm(chain, inputs) -> str:
+    """Runs the chain inside an LLM slot, recording queue wait, Ollama's own timings and parsing."""
+    queued_at = time.perf_counter()
+    async with llm_gate.slot():
+        telemetry.record("llm_queue", time.perf_counter() - queued_at)
+        with telemetry.span("llm"):
+            message = await chain.ainvoke(inputs)
+    telemetry.record_llm_metadata(message.response_metadata)
+    with telemetry.span("parse"):
+        return StrOutputParser().invoke(message).strip()
+
+async def answer_without_llm(query: str):
+    """Cheap answers before RAG: cached text, intent centroid, cached embedding.
+    Embeds the query at most once and returns the vector for retrieval to reuse."""
+    with telemetry.span("cache"):
+        cached = answer_cache.get_exact(query)
+    if cached:
+        telemetry.CHAT_ROUTES.inc("cache_exact")
+        return cached, None
+    query_vector = await embed_query(query)
+    intent = intent_router.classify(query_vector)
+    if intent:
+        telemetry.CHAT_ROUTES.inc("intent_semantic")
+        return intent_router.responses[intent], query_vector
+    with telemetry.span("cache"):
+        cached = answer_cache.get_similar(query_vector, query)
+    if cached:
+        telemetry.CHAT_ROUTES.inc("cache_semantic")
+    return cached, query_vector
+
+async def embed_query(query: str):
+    with telemetry.span("embed"):
+        return await models.embeddings.aembed_query(query)
+
+async def retrieve_context(req: ChatRequest, current_user: str, query_vector):
+    """Vault chunks (hybrid search), plus the user's uploaded document first when a doc_id is sent."""
+    with telemetry.span("retrieve"):
+        docs = await run_in_threadpool(models.retriever.search, req.query, query_vector, 2)
+    if req.doc_id:
+        with telemetry.span("doc_search"):
+            docs = session_docs.search(current_user, req.doc_id, query_vector, k=2) + docs
+    return docs
+
 @app.post("/api/chat")
-def process_chat(req: ChatRequest, current_user: str = Depends(verify_token)):
+async def process_chat(req: ChatRequest, current_user: str = Depends(verify_token)):
+    started_at = time.perf_counter()
+    if req.doc_id:
+        # Questions about an uploaded document skip canned/cached answers, which know nothing about it.
+        session_docs.touch(current_user, req.doc_id)
+        models.require_ready()
+        cached, query_vector = None, await embed_query(req.query)
+    else:
+        fast_answer = await instant_answer(req.query)
+        if fast_answer:
+            return {"status": "success", "response": fast_answer}
+        models.require_ready()
+        cached, query_vector = await answer_without_llm(req.query)
+    if cached:
+        return {"status": "success", "response": cached}
+
+    # Reject before paying for retrieval if the LLM queue is already full.
+    llm_gate.reject_if_full()
+    docs = await retrieve_context(req, current_user, query_vector)
+    if not docs:
+        telemetry.CHAT_ROUTES.inc("no_context")
+        return {"status": "success", "response": REJECT_RESPONSE}
+
+    telemetry.CHAT_ROUTES.inc("rag_doc" if req.doc_id else "rag")
+    final_output = await invoke_llm(*build_rag_chain(req.query, docs))
+    if not req.doc_id:
+        answer_cache.put(req.query, query_vector, final_output, cost_ms=1000 * (time.perf_counter() - started_at))
+    return {"status": "success", "response": final_output}
+
+@asynccontextmanager
+async def upload_slot():
+    global _uploads_pending
+    if _uploads_pending >= UPLOAD_MAX_PENDING:
+        raise QueueFull(retry_after=5, reason="upload queue full")
+    _uploads_pending += 1
     try:
-        q = req.query.lower()
-        
-        # 🔥 1. THE FAST-TRACK DICTIONARY (English Only)
-        responses = {
-            "theft": "Under Section 303 of BNS 2023, theft is punishable with imprisonment up to 3 years, or a fine, or both.",
-            "murder": "Under Section 103 of BNS 2023, the punishment for murder is either the death penalty or life imprisonment, along with a fine.",
-            "kidnap": "Under Section 137 of BNS 2023, kidnapping is punishable with imprisonment for up to 7 years and a fine.",
-            "hit and run": "Under Section 106(2) of BNS 2023, hit and run cases attract imprisonment up to 10 years and a fine.",
-            "defamation": "Under Section 356 of BNS 2023, defamation is punishable with simple imprisonment up to 2 years, a fine, or community service.",
-            "rape": "Under Section 63 of BNS 2023, the punishment for rape is rigorous imprisonment for not less than 10 years, which may extend to life imprisonment, and a fine.",
-            "fraud": "Under Section 318 of BNS 2023, cheating and fraud are punishable with imprisonment up to 3 years, or with a fine, or both.",
-            "reject": "I am a Judicial AI Assistant. I can only provide information related to the Bharatiya Nyaya Sanhita (BNS) 2023."
-        }
-
-        # 🎯 2. INTENT MATCHING (Offline Speed Route)
-        # Maintained Hindi keywords just in case someone types in Hinglish, but output will be strictly English.
-        intent = None
-        if any(w in q for w in ["theft", "steal", "bike", "chori"]): intent = "theft"
-        elif any(w in q for w in ["murder", "kill", "assassinate", "murdered"]): intent = "murder"
-        elif any(w in q for w in ["kidnap", "abduct"]): intent = "kidnap"
-        elif any(w in q for w in ["hit and run", "accident", "flee", "run over"]): intent = "hit and run"
-        elif any(w in q for w in ["defamation", "insult", "defame"]): intent = "defamation"
-        elif any(w in q for w in ["rape", "assault"]): intent = "rape"
-        elif any(w in q for w in ["fraud", "cheating", "scam"]): intent = "fraud"
-        elif any(w in q for w in ["company", "register", "recipe", "cricket"]): intent = "reject"
-
-        if intent:
-            return {"status": "success", "response": responses[intent]}
-
-        # 🧠 3. THE PURE LOCAL RAG FALLBACK (For Out of Syllabus Queries)
-        docs = vector_db.similarity_search(req.query, k=2)
-        if docs:
-            context = "\n".join([d.page_content for d in docs])
-            
-            local_prompt = f"""You are a highly professional Judicial AI Expert. 
-            Read this BNS 2023 law context carefully: '{context}'.
-            Based ONLY on the context, answer the user's query: '{req.query}'.
-            CRITICAL RULES:
-            - Answer STRICTLY in English.
-            - Provide a direct, factual, and professional legal response.
-            - Do not include internal thinking notes, brackets, or filler words.
-            Response:"""
-            
-            prompt = ChatPromptTemplate.from_template(local_prompt)
-            chain = prompt | llm | StrOutputParser()
-            final_output = chain.invoke({"input": ""}).strip()
-            return {"status": "success", "response": final_output}
-        else:
-            return {"status": "success", "response": responses["reject"]}
+        yield
+    finally:
+        _uploads_pending -= 1
+
+@app.post("/api/upload")
+async def upload_document(file: UploadFile = File(...), current_user: str = Depends(verify_token)):
+    if not (file.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="PDF is too large.")
+    models.require_ready()
+
+    async with upload_slot():
+        # Text extraction is CPU-bound -> threadpool; embeddings happen exactly once per upload.
+        with telemetry.span("pdf_extract"):
+            chunks, pages = await run_in_threadpool(pdf_to_chunks, file.file, UPLOAD_MAX_PAGES, UPLOAD_MAX_CHUNKS)
+        if not chunks:
+            raise HTTPException(status_code=422, detail="No readable text found in this PDF.")
+        with telemetry.span("embed"):
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                _upload_embed_pool, models.embeddings.embed_documents, [text for _, text in chunks])
+        doc_id = session_docs.add(current_user, file.filename, chunks, vectors)
+    return {"status": "success", "doc_id": doc_id, "pages": pages, "chunks": len(chunks)}
+
+@app.get("/api/stats")
+def service_stats():
+    stats = {"llm_queue": llm_gate.stats(), "answer_cache": answer_cache.stats(), "session_docs": session_docs.stats(),
+             "uploads": {"pending": _uploads_pending, "max_pending": UPLOAD_MAX_PENDING, "embed_workers": UPLOAD_EMBED_WORKERS}}
+    if models.ready:
+        stats["retrieval"] = models.retriever.stats()
+        if hasattr(models.embeddings, "stats"):
+            stats["query_embeddings"] = models.embeddings.stats()
+    return stats
+
+# --- 📊 PROMETHEUS METRICS ---
+telemetry.gauge("judicial_llm_queue_depth", "Requests waiting for an LLM slot.", lambda: llm_gate.waiting)
+telemetry.gauge("judicial_llm_in_flight", "Requests holding an LLM slot.", lambda: llm_gate.in_flight)
+telemetry.gauge("judicial_answer_cache_entries", "Answers in the semantic cache.", lambda: answer_cache.stats()["entries"])
+telemetry.gauge("judicial_uploads_pending", "Uploads being extracted or embedded.", lambda: _uploads_pending)
+telemetry.gauge("judicial_session_docs", "Uploaded documents held in memory.", lambda: session_docs.stats()["documents"])
+telemetry.gauge("judicial_models_ready", "1 once warm-up has finished.", lambda: int(models.ready))
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(telemetry.render_metrics(), media_type="text/plain; version=0.0.4")
+
+# --- 📡 TOKEN STREAMING (Server-Sent Events) ---
+def sse_event(event: str, data: dict):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+STREAM_END = object()
+_llm_streams = set()  # strong refs: asyncio only keeps weak ones to running tasks
+
+async def pump_llm_stream(chain, inputs, chunks: asyncio.Queue, stop: asyncio.Event):
+    """Holds the LLM slot and Ollama's stream in a task of its own and feeds chunks to the SSE
+    generator. A client disconnect cancels that generator, and a cancelled task cannot reliably
+    close the upstream response; this one can: it stops at the next chunk, closes the stream
+    (Ollama aborts generation) and only then gives the slot back."""
+    try:
+        queued_at = time.perf_counter()
+        async with llm_gate.slot():
+            telemetry.record("llm_queue", time.perf_counter() - queued_at)
+            llm_started_at = time.perf_counter()
+            first_token = True
+            stream = chain.astream(inputs)
+            try:
+                async for chunk in stream:
+                    if stop.is_set():
+                        break
+                    if chunk.content and first_token:
+                        telemetry.record("llm_first_token", time.perf_counter() - llm_started_at)
+                        first_token = False
+                    chunks.put_nowait(chunk)
+            finally:
+                await stream.aclose()
+                telemetry.record("llm", time.perf_counter() - llm_started_at)
     except Exception as e:
-        return {"status": "error", "response": "Local System Overload. Please try again."}
\ No newline at end of file
+        chunks.put_nowait(e)
+    finally:
+        chunks.put_nowait(STREAM_END)
+
+@app.post("/api/chat/stream")
+async def process_chat_stream(req: ChatRequest, current_user: str = Depends(verify_token)):
+    if req.doc_id:
+        session_docs.touch(current_user, req.doc_id)  # unknown doc -> 404 before streaming starts
+        fast_answer = None
+    else:
+        fast_answer = await instant_answer(req.query)
+    if fast_answer:
+        # Fast-track answers are already complete, so they go out as one event.
+        async def single_event():
+            yield sse_event("answer", {"status": "success", "response": fast_answer})
+        return StreamingResponse(single_event(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    # Cold models / full queue -> plain 503 + Retry-After, before any SSE headers go out.
+    models.require_ready()
+    llm_gate.reject_if_full()
+
+    async def token_stream():
+        try:
+            started_at = time.perf_counter()
+            if req.doc_id:
+                cached, query_vector = None, await embed_query(req.query)
+            else:
+                cached, query_vector = await answer_without_llm(req.query)
+            if cached:
+                yield sse_event("answer", {"status": "success", "response": cached})
+                return
+
+            docs = await retrieve_context(req, current_user, query_vector)
+            if not docs:
+                telemetry.CHAT_ROUTES.inc("no_context")
+                yield sse_event("answer", {"status": "success", "response": REJECT_RESPONSE})
+                return
+
+            telemetry.CHAT_ROUTES.inc("rag_doc" if req.doc_id else "rag")
+            chain, inputs = build_rag_chain(req.query, docs)
+            tokens, metadata = [], {}
+            chunks, stop = asyncio.Queue(), asyncio.Event()
+            pump = asyncio.create_task(pump_llm_stream(chain, inputs, chunks, stop))
+            _llm_streams.add(pump)
+            pump.add_done_callback(_llm_streams.discard)
+            try:
+                while (chunk := await chunks.get()) is not STREAM_END:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    metadata = chunk.response_metadata or metadata  # timings arrive on the last chunk
+                    if chunk.content:
+                        tokens.append(chunk.content)
+                        yield sse_event("token", {"token": chunk.content})
+            finally:
+                # Client went away (Starlette cancels this generator) -> the pump aborts Ollama.
+                stop.set()
+            telemetry.record_llm_metadata(metadata)
+            if not req.doc_id:
+                answer_cache.put(req.query, query_vector, "".join(tokens).strip(),
+                                 cost_ms=1000 * (time.perf_counter() - started_at))
+            # Headers left before these stages ran, so the stream carries its own Server-Timing.
+            yield sse_event("done", {"status": "success", "server_timing": telemetry.current_timings()})
+        except QueueFull as e:
+            telemetry.ERRORS.inc("QueueFull")
+            yield sse_event("error", {"status": "error", "response": "Judicial AI is busy. Please retry shortly.", "retry_after": e.retry_after})
+        except Exception as e:
+            error = telemetry.classify_error(e)
+            telemetry.ERRORS.inc(error)
+            _, message = ERROR_RESPONSES.get(error, (500, "Local System Overload. Please try again."))
+            yield sse_event("error", {"status": "error", "error": error, "response": message})
+
+    return StreamingResponse(token_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,241 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from statutes import parse_section_refs
+from vault import VaultVersionWatcher
+
+# --- 🧊 SEMANTIC ANSWER CACHE (RAG fallback ke liye) ---
+# Lookup do step mein hota hai:
+#   1. normalized query text par exact match (embedding bhi nahi lagti)
+#   2. query embedding par cosine similarity >= threshold
+# LRU + TTL eviction, memory cap, aur SQLite persistence taaki restart ke baad cache warm rahe.
+# MiniLM "Section 302" aur "Section 304" mein fark nahi karti -> semantic hit tabhi jab
+# dono queries ke section refs / numbers bilkul same hon.
+
+LAST_USED_FLUSH_EVERY = 64   # hits buffered before last_used is written back
+LAST_USED_FLUSH_S = 30.0
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9\s]", " ", query.lower()).split())
+
+
+def query_refs(query: str) -> str:
+    """Acts + numbers a query cites, e.g. "IPC 1860|302". Cached answers are only reused for equal refs."""
+    acts = {act for act, _, _ in parse_section_refs(query) if act}
+    numbers = set(re.findall(r"\d+[a-z]?", normalize_query(query)))
+    return ",".join(sorted(acts)) + "|" + ",".join(sorted(numbers))
+
+
+def _unit(vector) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    refs: str
+    vector: np.ndarray
+    answer: str
+    cost_ms: float
+    created_at: float
+
+    @property
+    def nbytes(self) -> int:
+        return self.vector.nbytes + len(self.key) + len(self.answer.encode())
+
+
+class SemanticAnswerCache:
+    def __init__(self, db_path="answer_cache.db", threshold=0.92, ttl_s=86400.0,
+                 max_entries=2000, max_bytes=32 * 1024 * 1024):
+        self.threshold = threshold
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._matrix = None  # stacked unit vectors, rebuilt lazily after writes
+        self._matrix_keys = []
+        self._touched = {}  # key -> last_used, written back in batches
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._vault = VaultVersionWatcher()
+
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.time_saved_ms = 0.0
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # sirf cache hai, crash par kuch entries jaana theek hai
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(answer_cache)")}
+        if columns and "refs" not in columns:
+            self._conn.execute("DROP TABLE answer_cache")  # entries from before refs were stored: unsafe to reuse
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS answer_cache (
+                key TEXT PRIMARY KEY,
+                refs TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                cost_ms REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                vault_version TEXT NOT NULL
+            )
+        ''')
+        self._load()
+
+    # --- 💾 PERSISTENCE ---
+    def _load(self):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM answer_cache WHERE vault_version != ? OR created_at < ?",
+                               (self._vault.version, now - self.ttl_s))
+            rows = self._conn.execute(
+                "SELECT key, refs, vector, answer, cost_ms, created_at FROM answer_cache ORDER BY last_used"
+            ).fetchall()
+            for key, refs, blob, answer, cost_ms, created_at in rows:
+                entry = CacheEntry(key, refs, np.frombuffer(blob, dtype=np.float32), answer, cost_ms, created_at)
+                self._entries[key] = entry
+                self._bytes += entry.nbytes
+            self._evict()
+            self._conn.commit()
+
+    def _check_vault(self):
+        # Judicial vault re-ingest hua -> saare purane answers invalid.
+        if self._vault.changed():
+            self._entries.clear()
+            self._bytes = 0
+            self._matrix = None
+            self._touched.clear()
+            self._conn.execute("DELETE FROM answer_cache")
+            self._conn.commit()
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+            self._matrix = None
+
+    def _expired(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.created_at > self.ttl_s
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        self._touched.pop(key, None)
+        self._matrix = None
+        self._conn.execute("DELETE FROM answer_cache WHERE key = ?", (key,))
+
+    def _flush_touched(self, force=False):
+        """Writes buffered last_used times (keeps SQLite off the per-hit path)."""
+        if not self._touched or not (force or len(self._touched) >= LAST_USED_FLUSH_EVERY
+                                     or time.monotonic() - self._flushed_at >= LAST_USED_FLUSH_S):
+            return
+        self._conn.executemany("UPDATE answer_cache SET last_used = ? WHERE key = ?",
+                               [(ts, key) for key, ts in self._touched.items()])
+        self._conn.commit()
+        self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def _hit(self, entry: CacheEntry, exact: bool):
+        self._entries.move_to_end(entry.key)
+        self._touched[entry.key] = time.time()
+        self._flush_touched()
+        if exact:
+            self.hits_exact += 1
+        else:
+            self.hits_semantic += 1
+        self.time_saved_ms += entry.cost_ms
+        return entry.answer
+
+    # --- 🔍 LOOKUPS ---
+    def get_exact(self, query: str):
+        """Step 1: normalized-text lookup. Does not count a miss, get_similar() decides that."""
+        key = normalize_query(query)
+        with self._lock:
+            self._check_vault()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry):
+                self._drop(key)
+                self._conn.commit()
+                return None
+            return self._hit(entry, exact=True)
+
+    def get_similar(self, vector, query: str):
+        """Step 2: nearest cached query embedding above the similarity threshold that cites
+        exactly the same acts / section numbers as the query."""
+        refs = query_refs(query)
+        with self._lock:
+            self._check_vault()
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._matrix_keys = list(self._entries.keys())
+                self._matrix = np.stack([self._entries[k].vector for k in self._matrix_keys])
+
+            scores = self._matrix @ _unit(vector)
+            above = np.flatnonzero(scores >= self.threshold)
+            entry = None
+            for i in above[np.argsort(-scores[above])]:
+                candidate = self._entries.get(self._matrix_keys[i])
+                if candidate is not None and candidate.refs == refs:
+                    entry = candidate
+                    break
+            if entry is None:
+                self.misses += 1
+                return None
+            if self._expired(entry):
+                self._drop(entry.key)
+                self._conn.commit()
+                self.misses += 1
+                return None
+            return self._hit(entry, exact=False)
+
+    def put(self, query: str, vector, answer: str, cost_ms: float):
+        key = normalize_query(query)
+        now = time.time()
+        entry = CacheEntry(key, query_refs(query), _unit(vector), answer, cost_ms, now)
+        with self._lock:
+            self._check_vault()
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            self._matrix = None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answer_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.refs, entry.vector.tobytes(), answer, cost_ms, now, now, self._vault.version),
+            )
+            self._touched.pop(key, None)
+            self._evict()
+            self._flush_touched(force=True)
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        hits = self.hits_exact + self.hits_semantic
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits_exact": self.hits_exact,
+            "hits_semantic": self.hits_semantic,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "time_saved_ms": round(self.time_saved_ms, 1),
+        }
@@ -1,10 +1,24 @@
+import asyncio
+import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 
+import telemetry
+from llm_gate import QueueFull
+
 # --- 🛡️ MILITARY-GRADE PASSWORD SECURITY SETUP ---
 # Ye tool tumhare password ko encrypt karega
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt jaan-boojh kar slow hai -> apne alag bounded pool par chalta hai,
+# taaki login storm mein event loop / request threads block na hon.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "64"))
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_bcrypt_pending = 0
+
 def hash_password(password: str):
     """Password ko hash (encrypt) karta hai"""
     return pwd_context.hash(password)
@@ -13,87 +27,122 @@ def verify_password(plain_password: str, hashed_password: str):
     """Check karta hai ki plain password aur hashed password match karte hain ya nahi"""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def _run_bcrypt(fn, *args):
+    global _bcrypt_pending
+    if _bcrypt_pending >= BCRYPT_MAX_PENDING:
+        raise QueueFull(retry_after=1, reason="bcrypt queue full")
+    _bcrypt_pending += 1
+    try:
+        with telemetry.span("bcrypt"):
+            return await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, fn, *args)
+    finally:
+        _bcrypt_pending -= 1
+
+async def hash_password_async(password: str):
+    return await _run_bcrypt(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
+
 # --- 🗄️ DATABASE CONNECTION ---
+# Har thread ka ek long-lived connection (WAL mode). sqlite3 har connection par
+# prepared statements cache karta hai, isliye SQL strings neeche constants hain.
+DB_PATH = os.getenv("USERS_DB", "users_v2.db") # Tumhara DB file
+_local = threading.local()
+
 def get_db_connection():
-    conn = sqlite3.connect('users_v2.db') # Tumhara DB file
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, timeout=5.0, cached_statements=128)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")   # readers writers ko block nahi karte
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        _local.conn = conn
     return conn
 
+SQL_LOGIN_PROFILE = "SELECT password, first_name, last_name, email, dob, location, phone, profile_pic FROM users WHERE phone = ?"
+SQL_USER_EXISTS = "SELECT 1 FROM users WHERE phone = ?"
+SQL_USER_DETAILS = "SELECT first_name, last_name, email, dob, location, phone, profile_pic FROM users WHERE phone = ?"
+SQL_INSERT_USER = '''
+    INSERT INTO users (phone, password, first_name, last_name, email, dob, location)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(phone) DO NOTHING
+'''
+
 # --- 🛠️ CREATE TABLES (Agar nahi bani hain) ---
 def create_tables():
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            phone TEXT PRIMARY KEY,
-            password TEXT NOT NULL,
-            first_name TEXT,
-            last_name TEXT,
-            email TEXT,
-            dob TEXT,
-            location TEXT,
-            profile_pic TEXT
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                phone TEXT PRIMARY KEY,
+                password TEXT NOT NULL,
+                first_name TEXT,
+                last_name TEXT,
+                email TEXT,
+                dob TEXT,
+                location TEXT,
+                profile_pic TEXT
+            )
+        ''')
 
 create_tables() # File run hote hi table check karega
 
+async def _run_db(fn, *args):
+    """DB calls from async endpoints go to the default thread pool (each thread keeps its connection)."""
+    with telemetry.span("db"):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
 # --- 🟢 USER REGISTRATION (Secure) ---
-def register_user(phone, password, first_name, last_name, email, dob, location):
-    if check_user_exists(phone):
-        return False
-    
-    # Password ko encrypt kar rahe hain
-    hashed_pw = hash_password(password)
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def _insert_user(phone, hashed_pw, first_name, last_name, email, dob, location):
     try:
-        # 🛡️ SQL INJECTION PROTECTED (Using '?')
-        cursor.execute('''
-            INSERT INTO users (phone, password, first_name, last_name, email, dob, location)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (phone, hashed_pw, first_name, last_name, email, dob, location))
-        conn.commit()
-        return True
+        # 🛡️ SQL INJECTION PROTECTED (Using '?'); existing phone -> 0 rows, no second lookup
+        conn = get_db_connection()
+        with conn:
+            cursor = conn.execute(SQL_INSERT_USER, (phone, hashed_pw, first_name, last_name, email, dob, location))
+        return cursor.rowcount == 1
     except Exception as e:
         print(f"DB Error: {e}")
         return False
-    finally:
-        conn.close()
+
+def register_user(phone, password, first_name, last_name, email, dob, location):
+    return _insert_user(phone, hash_password(password), first_name, last_name, email, dob, location)
+
+async def register_user_async(phone, password, first_name, last_name, email, dob, location):
+    hashed_pw = await hash_password_async(password)
+    return await _run_db(_insert_user, phone, hashed_pw, first_name, last_name, email, dob, location)
 
 # --- 🔐 LOGIN VERIFICATION (Secure) ---
-def check_login(phone, password):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def get_login_profile(phone):
+    """Credentials + profile in one query (the old flow selected the same row twice)."""
     # 🛡️ SQL INJECTION PROTECTED
-    cursor.execute("SELECT * FROM users WHERE phone = ?", (phone,))
-    user = cursor.fetchone()
-    conn.close()
-    
+    return get_db_connection().execute(SQL_LOGIN_PROFILE, (phone,)).fetchone()
+
+def _profile(user):
+    return {key: user[key] for key in ("first_name", "last_name", "email", "dob", "location", "phone", "profile_pic")}
+
+def check_login(phone, password):
+    user = get_login_profile(phone)
     # Check if user exists AND password is correct
     if user and verify_password(password, user['password']):
         return (user['first_name'], user['last_name'], user['profile_pic'])
     return None
 
+async def authenticate_async(phone, password):
+    """Returns the profile dict if the password matches, else None. bcrypt runs on its own pool."""
+    user = await _run_db(get_login_profile, phone)
+    if user and await verify_password_async(password, user['password']):
+        return _profile(user)
+    return None
+
 # --- 🔍 CHECK IF USER EXISTS ---
 def check_user_exists(phone):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT phone FROM users WHERE phone = ?", (phone,))
-    user = cursor.fetchone()
-    conn.close()
-    return user is not None
+    return get_db_connection().execute(SQL_USER_EXISTS, (phone,)).fetchone() is not None
 
 # --- 👤 GET USER DETAILS ---
 def get_full_user_details(phone):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT first_name, last_name, email, dob, location, phone, profile_pic FROM users WHERE phone = ?", (phone,))
-    user = cursor.fetchone()
-    conn.close()
+    user = get_db_connection().execute(SQL_USER_DETAILS, (phone,)).fetchone()
     if user:
         return tuple(user)
     return None
@@ -101,31 +150,25 @@ def get_full_user_details(phone):
 # --- ⚙️ UPDATE PROFILE ---
 def update_user_profile(phone, first_name, last_name, email, dob):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        UPDATE users 
-        SET first_name = ?, last_name = ?, email = ?, dob = ?
-        WHERE phone = ?
-    ''', (first_name, last_name, email, dob, phone))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute('''
+            UPDATE users
+            SET first_name = ?, last_name = ?, email = ?, dob = ?
+            WHERE phone = ?
+        ''', (first_name, last_name, email, dob, phone))
     return True
 
 # --- 🔑 RESET PASSWORD (Secure) ---
 def reset_password(phone, new_password):
     hashed_pw = hash_password(new_password)
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET password = ? WHERE phone = ?", (hashed_pw, phone))
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute("UPDATE users SET password = ? WHERE phone = ?", (hashed_pw, phone))
     return True
 
 # --- 🖼️ UPDATE PROFILE PIC ---
 def update_profile_picture(phone, pic_data):
     conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE users SET profile_pic = ? WHERE phone = ?", (pic_data, phone))
-    conn.commit()
-    conn.close()
-    return True
\ No newline at end of file
+    with conn:
+        conn.execute("UPDATE users SET profile_pic = ? WHERE phone = ?", (pic_data, phone))
+    return True
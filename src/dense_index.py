@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# --- 🧮 IN-MEMORY DENSE INDEX (optional Chroma replacement for vault search) ---
+# Vault chhota hai (kuch hazaar chunks x 384 dims), isliye poora collection ek contiguous
+# matrix mein rakh kar ek matrix-vector product se top-k nikal lete hain -- HNSW/SQLite ya
+# LangChain wrapping ka overhead nahi. int8 mode memory 4x kam karta hai (per-row scale).
+
+INT8_BLOCK_ROWS = 4096  # int8 rows are widened block by block, never the whole matrix at once
+
+
+def _unit_rows(matrix):
+    """Normalises rows in place (no full-size temporaries)."""
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    return matrix
+
+
+class DenseIndex:
+    """Exact cosine top-k; row i belongs to chunk i of the vault snapshot. MiniLM vectors are
+    unit length, so this ranks like Chroma's default l2 space (minus HNSW's approximation)."""
+
+    def __init__(self, vectors, dtype: str = "float32"):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"unsupported dense index dtype: {dtype}")
+        self.dtype = dtype
+        matrix = np.array(vectors if vectors is not None else [], dtype=np.float32)  # own copy, edited in place
+        matrix = _unit_rows(matrix.reshape(len(matrix), -1) if len(matrix) else np.zeros((0, 1), np.float32))
+        if dtype == "int8":
+            self.scales = (np.abs(matrix).max(axis=1) / 127).astype(np.float32)
+            matrix /= np.maximum(self.scales, 1e-12)[:, None]
+            self.matrix = np.rint(matrix, out=matrix).astype(np.int8)
+        else:
+            self.scales = None
+            self.matrix = np.ascontiguousarray(matrix)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, query_vector):
+        q = np.asarray(query_vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        if self.scales is None:
+            return self.matrix @ q
+        return np.concatenate([self.matrix[i:i + INT8_BLOCK_ROWS].astype(np.float32) @ q
+                               for i in range(0, len(self), INT8_BLOCK_ROWS)]) * self.scales
+
+    def search(self, query_vector, k: int):
+        """Row indexes of the k most similar vectors, best first."""
+        if len(self) == 0 or k <= 0:
+            return []
+        scores = self.scores(query_vector)
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])].tolist()
+
+
+# --- 🗂️ QUERY EMBEDDING CACHE ---
+class CachedQueryEmbeddings(Embeddings):
+    """Wraps an Embeddings object with an LRU of query vectors (same text -> no MiniLM forward pass).
+    Document embedding is passed straight through."""
+
+    def __init__(self, embeddings, max_entries: int):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _get(self, text):
+        with self._lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return vector
+
+    def _put(self, text, vector):
+        with self._lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def embed_query(self, text):
+        vector = self._get(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._put(text, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        vector = self._get(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._put(text, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts):
+        return await self.embeddings.aembed_documents(texts)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0}
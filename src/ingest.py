@@ -0,0 +1,214 @@
+"""Incremental statute ingestion into the judicial_vault Chroma collection.
+
+Usage (repo root se chalao):
+    python src/ingest.py src/data
+    python src/ingest.py "src/data/*.pdf" --workers 4 --batch-size 256
+    python src/ingest.py src/data --full      # manifest ignore karke sab re-embed
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from statutes import act_for_file, section_headings, SECTION_HEADING_RE, UNIT_BY_ACT
+from vault import VAULT_DIR, COLLECTION_NAME, EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, bump_vault_version
+
+MANIFEST_PATH = os.path.join(VAULT_DIR, "ingest_manifest.json")
+PAGES_PER_TASK = 25
+# Bump when chunk_pages() tags metadata differently -> unchanged PDFs get re-tagged (no re-embed).
+METADATA_VERSION = 2
+
+
+# --- 📂 INPUT + MANIFEST ---
+def resolve_pdfs(targets):
+    files = set()
+    for target in targets:
+        if os.path.isdir(target):
+            files.update(glob.glob(os.path.join(target, "**", "*.pdf"), recursive=True))
+        else:
+            files.update(p for p in glob.glob(target, recursive=True) if p.lower().endswith(".pdf"))
+    return sorted(os.path.relpath(p) for p in files)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+
+
+def save_manifest(manifest):
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+# --- 📄 PAGE EXTRACTION (process pool) ---
+def extract_page_range(path, start, stop):
+    """Runs in a worker process. Returns [(page_number, text)] for pages [start, stop)."""
+    reader = PdfReader(path)
+    return [(i + 1, reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def extract_all(paths, workers):
+    """{path: [(page_number, text), ...]} with every PDF split into page-range tasks."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for path in paths:
+            total = len(PdfReader(path).pages)
+            for start in range(0, total, PAGES_PER_TASK):
+                futures[pool.submit(extract_page_range, path, start, min(start + PAGES_PER_TASK, total))] = path
+        pages = {path: [] for path in paths}
+        for future, path in futures.items():
+            pages[path].extend(future.result())
+    for path in pages:
+        pages[path].sort()
+    return pages
+
+
+# --- ✂️ CHUNKING + METADATA ---
+def metadata_hash(metadata):
+    return hashlib.sha1(json.dumps(metadata, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def chunk_pages(path, pages, splitter):
+    """Chunks with content-hash ids, tagged with every section whose text they contain."""
+    act = act_for_file(path)
+    unit = UNIT_BY_ACT.get(act, "Section")
+    source = os.path.basename(path)
+    chunks = []
+    current_section = ""
+    for page_number, text in pages:
+        for piece in splitter.split_text(text):
+            # A chunk that doesn't open with a heading continues the previous section.
+            carried = [current_section] if current_section and not SECTION_HEADING_RE.match(piece) else []
+            sections = carried + [h for h in dict.fromkeys(section_headings(piece)) if h not in carried]
+            if sections:
+                current_section = sections[-1]
+            chunk_id = hashlib.sha1(f"{act}|{page_number}|{piece}".encode()).hexdigest()
+            chunks.append({
+                "id": chunk_id,
+                "text": piece,
+                "metadata": {
+                    "source": source,
+                    "act": act,
+                    "unit": unit,
+                    "page": page_number,
+                    "seq": len(chunks),
+                    "section": sections[0] if sections else "",
+                    # ",318,319," -> every section this chunk has text of
+                    "sections": "," + ",".join(sections) + ",",
+                },
+            })
+    # Same text on the same page twice (headers/footers) -> keep one.
+    return list({c["id"]: c for c in chunks}.values())
+
+
+# --- 🧠 EMBED + UPSERT ---
+def embed_and_upsert(collection, embeddings, chunks, batch_size):
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        vectors = embeddings.embed_documents([c["text"] for c in batch])
+        collection.upsert(
+            ids=[c["id"] for c in batch],
+            embeddings=vectors,
+            documents=[c["text"] for c in batch],
+            metadatas=[c["metadata"] for c in batch],
+        )
+        print(f"   ↳ embedded {start + len(batch)}/{len(chunks)} chunks")
+
+
+def retag(collection, chunks, batch_size):
+    """Kept chunks whose position-dependent metadata (seq, carried section) moved: update in place."""
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        collection.update(ids=[c["id"] for c in batch], metadatas=[c["metadata"] for c in batch])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest statute PDFs into the judicial vault.")
+    parser.add_argument("targets", nargs="+", help="PDF files, directories or glob patterns")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="page extraction processes")
+    parser.add_argument("--batch-size", type=int, default=256, help="chunks per embedding batch")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest entries of the targets and re-embed them")
+    parser.add_argument("--prune", action="store_true", help="drop chunks of manifest PDFs not in the targets")
+    args = parser.parse_args()
+
+    started_at = time.perf_counter()
+    paths = resolve_pdfs(args.targets)
+    if not paths:
+        print("❌ No PDFs found.")
+        return
+
+    # --full only forgets the targets' entries; every other PDF's entry is saved back untouched.
+    manifest = load_manifest()
+    known = manifest["files"]
+    hashes = {path: file_sha256(path) for path in paths}
+    changed = paths if args.full else [p for p in paths if known.get(p, {}).get("sha256") != hashes[p]
+                                       or known[p].get("metadata_version") != METADATA_VERSION]
+    removed = [p for p in known if p not in hashes] if args.prune else []
+    print(f"📚 {len(paths)} PDFs, {len(changed)} new/changed/re-tag, {len(removed)} to prune")
+    if not changed and not removed:
+        print("✅ Judicial vault already up to date.")
+        return
+
+    import chromadb
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    collection = chromadb.PersistentClient(path=VAULT_DIR).get_or_create_collection(COLLECTION_NAME)
+    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": 64})
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+    for path in removed:
+        stale = known.pop(path)["chunk_ids"]
+        if stale:
+            collection.delete(ids=stale)
+        print(f"🗑️  {path}: removed {len(stale)} chunks")
+
+    pages = extract_all(changed, max(1, args.workers or 1))
+    for path in changed:
+        chunks = chunk_pages(path, pages[path], splitter)
+        if args.full or path not in known:
+            # First sight of this PDF: clear chunks from older, manifest-less ingests of it.
+            collection.delete(where={"source": {"$in": [os.path.basename(path), path]}})
+        old_ids = set() if args.full else set(known.get(path, {}).get("chunk_ids", []))
+        old_meta = {} if args.full else known.get(path, {}).get("metadata_hashes", {})
+        new_ids = {c["id"] for c in chunks}
+        meta = {c["id"]: metadata_hash(c["metadata"]) for c in chunks}
+
+        stale = sorted(old_ids - new_ids)
+        if stale:
+            collection.delete(ids=stale)
+        fresh = [c for c in chunks if c["id"] not in old_ids]
+        # Same text, but seq / carried section shifted (earlier page edited, or older tagging scheme).
+        moved = [c for c in chunks if c["id"] in old_ids and old_meta.get(c["id"]) != meta[c["id"]]]
+        print(f"📄 {path}: {len(chunks)} chunks, {len(fresh)} to embed, {len(moved)} to re-tag, {len(stale)} stale")
+        embed_and_upsert(collection, embeddings, fresh, args.batch_size)
+        retag(collection, moved, args.batch_size)
+
+        known[path] = {"sha256": hashes[path], "act": act_for_file(path), "chunk_ids": sorted(new_ids),
+                       "metadata_version": METADATA_VERSION, "metadata_hashes": meta}
+        save_manifest(manifest)  # har file ke baad, taaki beech mein crash ho to kaam bacha rahe
+
+    bump_vault_version()
+    print(f"✅ Ingestion complete in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import json
+import os
+import re
+from collections import deque
+
+import numpy as np
+
+# --- 🎯 COMPILED INTENT ROUTER (Offline Speed Route) ---
+# intents.json ek baar load hota hai aur saare keywords ek Aho-Corasick automaton
+# mein compile hote hain: query ek hi pass mein scan hoti hai, chahe kitne bhi intents hon.
+# Matches sirf poore words/phrases par count hote hain ("skill" != "kill").
+
+INTENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intents.json")
+
+
+def normalize_text(text: str) -> str:
+    """Lower-case, punctuation -> space, single spaces. Space is then the only word boundary."""
+    return " ".join(re.sub(r"[^a-z0-9\s]", " ", text.lower()).split())
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over characters; reports (end_index, pattern_length, intent_id)."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+    def add(self, pattern: str, intent_id: int):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), intent_id))
+
+    def compile(self):
+        # BFS from the root's children (their failure link is the root itself).
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self, text: str):
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, intent_id in self._out[node]:
+                yield i + 1, length, intent_id
+
+
+class IntentRouter:
+    def __init__(self, intents_file: str = INTENTS_FILE):
+        with open(intents_file, encoding="utf-8") as f:
+            intents = json.load(f)["intents"]
+
+        # List order = priority, same as the old if/elif chain.
+        self.names = [intent["name"] for intent in intents]
+        self.responses = {intent["name"]: intent["response"] for intent in intents}
+        self._examples = [intent.get("examples", []) for intent in intents]
+
+        self._automaton = KeywordAutomaton()
+        for intent_id, intent in enumerate(intents):
+            for keyword in intent["keywords"]:
+                self._automaton.add(normalize_text(keyword), intent_id)
+        self._automaton.compile()
+
+        # Stage 2 (optional): intent centroids in embedding space.
+        self._centroids = None
+        self._centroid_ids = []
+        self.semantic_threshold = None
+
+    # --- ⚡ STAGE 1: KEYWORD AUTOMATON ---
+    def match(self, query: str):
+        """Returns the highest-priority intent with a whole-word keyword hit, or None."""
+        text = normalize_text(query)
+        best = None
+        for end, length, intent_id in self._automaton.scan(text):
+            start = end - length
+            if start > 0 and text[start - 1] != " ":
+                continue
+            if end < len(text) and text[end] != " ":
+                continue
+            if best is None or intent_id < best:
+                best = intent_id
+                if best == 0:
+                    break
+        return self.names[best] if best is not None else None
+
+    # --- 🧭 STAGE 2: EMBEDDING CENTROIDS ---
+    def build_centroids(self, embed_documents, threshold: float):
+        """Precomputes one unit centroid per intent that has examples. embed_documents: list[str] -> vectors."""
+        ids = [i for i, examples in enumerate(self._examples) if examples]
+        if not ids:
+            return
+        centroids = []
+        for i in ids:
+            vectors = np.asarray(embed_documents(self._examples[i]), dtype=np.float32)
+            centroid = vectors.mean(axis=0)
+            centroids.append(centroid / np.linalg.norm(centroid))
+        self._centroids = np.stack(centroids)
+        self._centroid_ids = ids
+        self.semantic_threshold = threshold
+
+    def classify(self, query_vector):
+        """Nearest intent centroid if its cosine similarity clears the threshold, else None."""
+        if self._centroids is None:
+            return None
+        v = np.asarray(query_vector, dtype=np.float32)
+        scores = self._centroids @ (v / np.linalg.norm(v))
+        best = int(np.argmax(scores))
+        if scores[best] < self.semantic_threshold:
+            return None
+        return self.names[self._centroid_ids[best]]
@@ -0,0 +1,89 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+# --- 🚦 LLM ADMISSION CONTROL ---
+# Ek hi local Ollama hai, isliye saare LLM calls ek bounded pool se guzarte hain.
+# Queue bhar gayi to request turant reject hoti hai (Retry-After ke saath),
+# kaam khatam hone ke baad nahi.
+
+
+class QueueFull(Exception):
+    """Raised when the LLM queue is full or a request waited too long for a slot."""
+
+    def __init__(self, retry_after: int, reason: str = "queue full"):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class LLMGate:
+    def __init__(self, max_concurrency: int = 2, max_queue: int = 16, queue_timeout: float = 30.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        # Moving average of how long one LLM call holds a slot, used for Retry-After.
+        self.avg_service_s = 5.0
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self.avg_service_s))
+
+    def reject_if_full(self):
+        """Fast-fail check for callers that must decide before they start responding."""
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        queued_at = time.perf_counter()
+        if not self._slots.locked():
+            # Free slot: acquire() returns without suspending, so nothing queues.
+            await self._slots.acquire()
+        else:
+            self.reject_if_full()
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise QueueFull(self.retry_after(), reason="queue timeout")
+            finally:
+                self.waiting -= 1
+
+        started_at = time.perf_counter()
+        wait_s = started_at - queued_at
+        self.admitted += 1
+        self.total_wait_s += wait_s
+        self.max_wait_s = max(self.max_wait_s, wait_s)
+        self.in_flight += 1
+        try:
+            yield wait_s
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+            service_s = time.perf_counter() - started_at
+            self.avg_service_s = 0.8 * self.avg_service_s + 0.2 * service_s
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_queue_wait_ms": round(1000 * self.total_wait_s / self.admitted, 2) if self.admitted else 0.0,
+            "max_queue_wait_ms": round(1000 * self.max_wait_s, 2),
+            "avg_service_ms": round(1000 * self.avg_service_s, 2),
+        }
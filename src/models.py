@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+
+from vault import VAULT_DIR, COLLECTION_NAME, EMBEDDING_MODEL
+
+# --- 🧠 MODEL LIFECYCLE (lazy load + background warm-up) ---
+# Import ke time kuch heavy load nahi hota. Startup ke baad ek background thread
+# embedder, Chroma index aur llama3 ko garam karta hai; tab tak /health/ready 503 deta hai
+# taaki orchestrator sirf warmed workers ko traffic bheje.
+
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Cap on generated tokens so one rambling answer cannot hold an LLM slot indefinitely.
+OLLAMA_NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT", "512"))
+WARMUP_RETRY_S = float(os.getenv("WARMUP_RETRY_S", "10"))
+# Benchmarks / offline runs: deterministic hash-based vectors instead of MiniLM.
+FAKE_EMBEDDINGS = os.getenv("JUDICIAL_FAKE_EMBEDDINGS", "") == "1"
+EMBEDDING_DIM = 384
+# Dense vault search: "chroma" (HNSW on disk) or "memory" (whole collection in one float32/int8 matrix).
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")
+MEMORY_INDEX_DTYPE = os.getenv("MEMORY_INDEX_DTYPE", "float32")
+QUERY_EMBED_CACHE = int(os.getenv("QUERY_EMBED_CACHE", "1024"))  # 0 disables the LRU
+
+
+class ModelsNotReady(Exception):
+    """Raised when a request needs the AI core before warm-up has finished."""
+
+
+class ModelManager:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._vector_db = None
+        self._llm = None
+        self._retriever = None
+
+        self.state = "cold"  # cold -> warming -> ready | failed (retried)
+        self.error = None
+        self.stage_ms = {}
+        self.extra_steps = []  # (name, fn) run after the core models are warm
+
+    # --- 💤 LAZY CONSTRUCTION (double-checked, thread-safe) ---
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    if FAKE_EMBEDDINGS:
+                        from langchain_core.embeddings import DeterministicFakeEmbedding
+                        embeddings = DeterministicFakeEmbedding(size=EMBEDDING_DIM)
+                    else:
+                        from langchain_huggingface import HuggingFaceEmbeddings
+                        embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+                    if QUERY_EMBED_CACHE > 0:
+                        from dense_index import CachedQueryEmbeddings
+                        embeddings = CachedQueryEmbeddings(embeddings, QUERY_EMBED_CACHE)
+                    self._embeddings = embeddings
+        return self._embeddings
+
+    @property
+    def vector_db(self):
+        if self._vector_db is None:
+            with self._lock:
+                if self._vector_db is None:
+                    from langchain_chroma import Chroma
+                    self._vector_db = Chroma(persist_directory=VAULT_DIR, embedding_function=self.embeddings,
+                                             collection_name=COLLECTION_NAME)
+        return self._vector_db
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    from langchain_ollama import ChatOllama
+                    # Strictly Local Llama 3 (Runs fastest in English)
+                    self._llm = ChatOllama(model=OLLAMA_MODEL, base_url=OLLAMA_BASE_URL, temperature=0.1,
+                                           num_predict=OLLAMA_NUM_PREDICT)
+        return self._llm
+
+    @property
+    def retriever(self):
+        if self._retriever is None:
+            with self._lock:
+                if self._retriever is None:
+                    from retrieval import HybridRetriever
+                    # Section-number index + BM25 over the same chunks, fused with Chroma's dense results.
+                    # Memory backend reads the collection itself and keeps no Chroma client alive.
+                    vector_db = self.vector_db if RETRIEVAL_BACKEND == "chroma" else None
+                    self._retriever = HybridRetriever(vector_db, RETRIEVAL_BACKEND, MEMORY_INDEX_DTYPE)
+        return self._retriever
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def require_ready(self):
+        if not self.ready:
+            raise ModelsNotReady(self.state)
+
+    # --- 🔥 WARM-UP ---
+    def _timed(self, name, fn):
+        started_at = time.perf_counter()
+        fn()
+        self.stage_ms[name] = round(1000 * (time.perf_counter() - started_at), 1)
+
+    def _warm_llm(self):
+        from langchain_ollama import ChatOllama
+        # 1-token generation: forces Ollama to load llama3 into memory without a full answer.
+        ChatOllama(model=OLLAMA_MODEL, base_url=OLLAMA_BASE_URL, num_predict=1).invoke("OK")
+
+    def warm_up(self):
+        """Blocking. Loads and exercises every model once; retries until it succeeds."""
+        while True:
+            self.state, self.error = "warming", None
+            try:
+                self._timed("embeddings", lambda: self.embeddings.embed_query("warm up"))
+                if RETRIEVAL_BACKEND == "chroma":
+                    self._timed("vector_db", lambda: self.vector_db.similarity_search_by_vector(
+                        self.embeddings.embed_query("punishment for theft"), k=1))
+                self._timed("retriever", lambda: self.retriever)
+                self._timed("llm", self._warm_llm)
+                for name, fn in self.extra_steps:
+                    self._timed(name, fn)
+                self.state = "ready"
+                print("✅ Fast Offline AI Core Loaded! (English Mode)")
+                return
+            except Exception as e:
+                self.state, self.error = "failed", f"{type(e).__name__}: {e}"
+                print(f"⚠️ AI Error: {e} (retrying in {WARMUP_RETRY_S:.0f}s)")
+                time.sleep(WARMUP_RETRY_S)
+
+    def start_warm_up(self):
+        threading.Thread(target=self.warm_up, name="model-warm-up", daemon=True).start()
+
+    def status(self) -> dict:
+        return {"status": self.state, "error": self.error, "warm_up_ms": self.stage_ms}
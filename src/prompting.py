@@ -0,0 +1,90 @@
+import os
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from vault import CHUNK_OVERLAP
+
+# --- 🧾 RAG PROMPT + CONTEXT ASSEMBLY ---
+# Template ek hi baar compile hota hai. System prefix har request mein byte-for-byte same rehta hai,
+# isliye Ollama uska KV cache reuse kar leta hai; sirf context + question naya prefill hota hai.
+# Context token budget ke andar rehta hai -> prefill time aur answer time predictable.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))
+# An uploaded document gets its own share, so its chunks never crowd the statutes out.
+DOC_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_DOC_CONTEXT_TOKENS", "600"))
+CHARS_PER_TOKEN = 4       # rough English/llama3 ratio; avoids loading a tokenizer on the hot path
+MIN_OVERLAP_CHARS = 30    # shorter "overlaps" are usually coincidence (a space, "the ")
+MIN_TAIL_CHARS = 200      # a trimmed last chunk shorter than this adds noise, not evidence
+
+SYSTEM_PROMPT = """You are a highly professional Judicial AI Expert.
+You answer questions about Indian criminal law (BNS 2023 and related acts).
+CRITICAL RULES:
+- Base the answer ONLY on the law context given with the question.
+- Answer STRICTLY in English.
+- Provide a direct, factual, and professional legal response.
+- Do not include internal thinking notes, brackets, or filler words."""
+
+RAG_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", SYSTEM_PROMPT),
+    ("human", "Law context:\n{context}\n\nQuery: {question}\n\nResponse:"),
+])
+
+
+def overlap_length(text: str, piece: str, max_overlap: int = CHUNK_OVERLAP) -> int:
+    """Length of the longest suffix of text that is also a prefix of piece (splitter overlap)."""
+    for n in range(min(len(text), len(piece), max_overlap), MIN_OVERLAP_CHARS - 1, -1):
+        if text.endswith(piece[:n]):
+            return n
+    return 0
+
+
+def _merge_into(blocks, piece):
+    """Adds piece to an adjacent block (dropping the shared overlap) or as a new block."""
+    for i, block in enumerate(blocks):
+        if piece in block:
+            return
+        if n := overlap_length(block, piece):
+            blocks[i] = block + piece[n:]
+            return
+        if n := overlap_length(piece, block):
+            blocks[i] = piece + block[n:]
+            return
+    blocks.append(piece)
+
+
+def _trim(text: str, max_chars: int) -> str:
+    """Cuts at the last sentence end (else word break) that fits."""
+    cut = text[:max_chars]
+    end = cut.rfind(". ")
+    if end > max_chars // 2:
+        return cut[:end + 1]
+    return cut.rsplit(" ", 1)[0] + " ..."
+
+
+def assemble_context(docs, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """Retrieved chunks (best first) -> deduped, overlap-stitched context within the token budget."""
+    blocks = []
+    for doc in docs:
+        piece = doc.page_content.strip()
+        if piece:
+            _merge_into(blocks, piece)
+
+    budget_chars, parts = budget_tokens * CHARS_PER_TOKEN, []
+    for block in blocks:
+        if len(block) > budget_chars:
+            if budget_chars >= MIN_TAIL_CHARS or not parts:
+                parts.append(_trim(block, budget_chars))
+            break
+        parts.append(block)
+        budget_chars -= len(block) + 2
+    return "\n\n".join(parts)
+
+
+def rag_inputs(query: str, docs) -> dict:
+    uploaded = [d for d in docs if d.metadata.get("uploaded")]
+    vault = [d for d in docs if not d.metadata.get("uploaded")]
+    context = assemble_context(vault)
+    if uploaded:
+        context = (f"From the user's uploaded document:\n{assemble_context(uploaded, DOC_CONTEXT_TOKEN_BUDGET)}"
+                   f"\n\nFrom the statutes:\n{context}")
+    return {"context": context, "question": query.strip()}
@@ -0,0 +1,239 @@
+import heapq
+import math
+import multiprocessing
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from langchain_core.documents import Document
+
+import telemetry
+from dense_index import DenseIndex
+from statutes import parse_section_refs, SECTION_HEADING_RE
+from vault import VAULT_DIR, COLLECTION_NAME, VaultVersionWatcher
+
+# --- 🔀 HYBRID RETRIEVAL (section index + BM25 + Chroma, rank fusion) ---
+# MiniLM embeddings "Section 318" / "IPC 420" jaise numbers ko theek se match nahi karti.
+# Isliye judicial_vault ke chunks par do aur index bante hain:
+#   1. exact (act, section) index -- ingest ke time tag hua metadata
+#   2. in-process BM25 inverted index
+# Teeno rankings Reciprocal Rank Fusion se merge hoti hain.
+# Dense side: Chroma, ya RETRIEVAL_BACKEND=memory par poora collection ek in-process matrix mein.
+
+RRF_K = 60
+EXACT_WEIGHT = 2.0  # an explicit section reference outranks fuzzy matches
+DEFAULT_ACT = "BNS 2023"
+# Words that don't turn a bare section lookup into a real question.
+LOOKUP_FILLER = {
+    "what", "whats", "does", "do", "is", "say", "says", "said", "tell", "me", "about", "show", "the",
+    "of", "in", "under", "text", "read", "section", "sec", "s", "article", "art", "act", "law",
+    "bns", "ipc", "constitution", "please", "give", "provision", "provisions", "2023", "1860",
+}
+MAX_DIRECT_ANSWER_CHARS = 1500
+# Only these metadata keys are kept per chunk (seq / sections are folded into the section index).
+KEPT_METADATA = ("source", "act", "unit", "page", "section")
+REBUILD_RETRY_S = 10.0  # failed snapshot rebuild (Chroma locked mid-ingest, OOM) -> retry after this
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str):
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(list)  # term -> [(doc_idx, term_freq)]
+        self.doc_len = []
+        for idx, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((idx, tf))
+        n = len(self.doc_len)
+        self.avg_len = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def search(self, query: str, k: int):
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for idx, tf in self.postings[term]:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[idx] / self.avg_len)
+                scores[idx] += idf * tf * (self.k1 + 1) / norm
+        return [idx for idx, _ in heapq.nlargest(k, scores.items(), key=lambda item: item[1])]
+
+
+def _read_collection(include):
+    """Runs in a throwaway process. Opening Chroma costs ~130 MB of RSS (Rust runtime, SQLite and
+    segment caches) that the allocator never hands back, even after the client is closed."""
+    import chromadb
+    data = chromadb.PersistentClient(path=VAULT_DIR).get_or_create_collection(COLLECTION_NAME).get(include=include)
+    rows = {key: data[key] for key in include}
+    if "embeddings" in rows:
+        embeddings = rows["embeddings"]
+        rows["embeddings"] = np.asarray(embeddings if embeddings is not None else [], dtype=np.float32)
+    return rows
+
+
+def read_collection_isolated(include):
+    """All vault rows, read in a spawned child so the server process never loads a Chroma client."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_read_collection, include).result()
+
+
+class _VaultSnapshot:
+    """Everything built from one version of the collection; swapped as a whole on re-ingest.
+    Chunks are kept as parallel text / metadata lists; Documents are only built for results."""
+
+    def __init__(self, texts, metadatas, embeddings=None, dense_dtype="float32"):
+        metadatas = [m or {} for m in metadatas]
+        self.texts = list(texts)
+        self.metadatas = [{key: m[key] for key in KEPT_METADATA if key in m} for m in metadatas]
+        self.bm25 = BM25Index(texts)
+        # Memory backend: row i of the matrix is chunk i, so dense hits need no text lookup.
+        self.dense = DenseIndex(embeddings, dense_dtype) if embeddings is not None else None
+        # Chroma backend maps its Documents back to chunk indexes by text.
+        self.idx_by_text = {t: i for i, t in enumerate(texts)} if self.dense is None else {}
+
+        # (act, section) -> chunk indexes in reading order (tagged at ingest time).
+        self.sections = defaultdict(list)
+        order = sorted(range(len(texts)), key=lambda i: (metadatas[i].get("act", ""), metadatas[i].get("seq", 0)))
+        for i in order:
+            for number in filter(None, metadatas[i].get("sections", "").split(",")):
+                self.sections[(metadatas[i].get("act"), number)].append(i)
+
+    def doc(self, i) -> Document:
+        return Document(page_content=self.texts[i], metadata=dict(self.metadatas[i]))
+
+    def resolve_act(self, act, number):
+        """Act for a reference that may not name one: BNS first, then any act that has the section."""
+        if act is not None:
+            return act
+        if (DEFAULT_ACT, number) in self.sections:
+            return DEFAULT_ACT
+        acts = sorted(a for (a, n) in self.sections if n == number and a)
+        return acts[0] if acts else None
+
+
+class HybridRetriever:
+    def __init__(self, vector_db=None, dense_backend="chroma", dense_dtype="float32"):
+        """vector_db (LangChain Chroma) is only needed for the "chroma" backend."""
+        if dense_backend not in ("chroma", "memory"):
+            raise ValueError(f"unknown retrieval backend: {dense_backend}")
+        self.vector_db = vector_db
+        self.dense_backend, self.dense_dtype = dense_backend, dense_dtype
+        self._vault = VaultVersionWatcher()
+        self._lock = threading.Lock()
+        self._retry_at = 0.0
+        self._snapshot = self._build()
+
+    def _build(self):
+        if self.dense_backend == "memory":
+            data = read_collection_isolated(["documents", "metadatas", "embeddings"])
+            return _VaultSnapshot(data["documents"], data["metadatas"], data["embeddings"], self.dense_dtype)
+        data = self.vector_db.get(include=["documents", "metadatas"])
+        return _VaultSnapshot(data["documents"], data["metadatas"])
+
+    def _current(self):
+        # One caller rebuilds after a re-ingest; concurrent callers keep reading the old snapshot.
+        if self._lock.acquire(blocking=False):
+            try:
+                version = self._vault.pending()
+                if version is not None and time.monotonic() >= self._retry_at:
+                    try:
+                        snapshot = self._build()
+                    except Exception as e:
+                        # Keep serving the old snapshot; the version stays pending, so we try again.
+                        self._retry_at = time.monotonic() + REBUILD_RETRY_S
+                        print(f"⚠️ Vault snapshot rebuild failed: {e} (retrying in {REBUILD_RETRY_S:.0f}s)")
+                    else:
+                        self._snapshot = snapshot
+                        self._vault.commit(version)
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        stats = {"backend": self.dense_backend, "chunks": len(snap.texts)}
+        if snap.dense is not None:
+            stats.update(dtype=snap.dense.dtype, index_bytes=snap.dense.nbytes)
+        return stats
+
+    # --- 📖 DIRECT SECTION LOOKUP (no LLM) ---
+    def direct_answer(self, query: str):
+        """Bare lookups like "what does Section 318 say" / "IPC 420" are answered from the bare act text."""
+        refs = parse_section_refs(query)
+        if len(refs) != 1:
+            return None
+        act, number, (start, end) = refs[0]
+        rest = [w for w in tokenize(query[:start] + " " + query[end:]) if w not in LOOKUP_FILLER]
+        if rest:
+            return None  # a real question about the section -> let RAG answer with it as context
+
+        snap = self._current()
+        act = snap.resolve_act(act, number)
+        chunk_ids = snap.sections.get((act, number))
+        if not chunk_ids:
+            return None
+
+        text = ""
+        for i in chunk_ids:
+            piece = snap.texts[i]
+            # Ingest chunks overlap by up to 200 chars -- stitch without repeating the overlap.
+            overlap = next((n for n in range(min(len(text), len(piece), 200), 0, -1)
+                            if text.endswith(piece[:n])), 0)
+            text += piece[overlap:]
+        heading = re.search(rf"(?m)^\s*{re.escape(number)}\.", text)
+        if heading:
+            text = text[heading.start():]
+            following = SECTION_HEADING_RE.search(text, heading.end() - heading.start())
+            if following:
+                text = text[:following.start()]
+        text = text.strip()
+        if len(text) > MAX_DIRECT_ANSWER_CHARS:
+            text = text[:MAX_DIRECT_ANSWER_CHARS].rsplit(" ", 1)[0] + " ..."
+        unit = snap.metadatas[chunk_ids[0]].get("unit", "Section")
+        return f"{unit} {number} of {act}:\n\n{text}"
+
+    # --- 🔀 FUSED SEARCH ---
+    def search(self, query: str, query_vector, k: int = 2, candidates: int = 20):
+        """Top-k Documents fused from exact section hits, BM25 and dense Chroma results."""
+        snap = self._current()
+        rankings = []
+
+        exact = []
+        for act, number, _ in parse_section_refs(query):
+            exact.extend(snap.sections.get((snap.resolve_act(act, number), number), []))
+        if exact:
+            rankings.append((EXACT_WEIGHT, list(dict.fromkeys(exact))[:candidates]))
+
+        with telemetry.span("bm25"):
+            rankings.append((1.0, snap.bm25.search(query, candidates)))
+
+        if snap.dense is not None:
+            with telemetry.span("dense"):
+                dense_ranked = snap.dense.search(query_vector, candidates)
+            dense = None
+        else:
+            with telemetry.span("chroma"):
+                dense = self.vector_db.similarity_search_by_vector(query_vector, k=candidates)
+            dense_ranked = [snap.idx_by_text[d.page_content] for d in dense if d.page_content in snap.idx_by_text]
+        rankings.append((1.0, dense_ranked))
+
+        fused = defaultdict(float)
+        for weight, ranking in rankings:
+            for rank, idx in enumerate(ranking):
+                fused[idx] += weight / (RRF_K + rank + 1)
+        best = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+        if not best:
+            return (dense or [])[:k]  # chroma snapshot is stale/empty -> dense results as-is
+        return [snap.doc(idx) for idx, _ in best]
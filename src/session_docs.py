@@ -0,0 +1,111 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from vault import CHUNK_SIZE, CHUNK_OVERLAP
+
+# --- 📎 PER-USER UPLOADED DOCUMENTS (ephemeral, in-memory) ---
+# FIR / judgment ek baar upload hota hai: text extract + chunk + embed sirf ek baar,
+# phir har sawaal mein sirf doc_id aata hai. Memory bounded hai: per-user doc limit,
+# global byte cap (LRU), aur idle documents apne aap evict ho jaate hain.
+
+
+class DocumentNotFound(Exception):
+    """Unknown, expired or someone else's doc_id."""
+
+
+def pdf_to_chunks(fileobj, max_pages: int, max_chunks: int):
+    """Extracts and splits page by page, stopping as soon as either cap is hit.
+    Returns (chunks, pages_read)."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    reader = PdfReader(fileobj)
+    chunks = []
+    pages_read = 0
+    for page_index in range(min(len(reader.pages), max_pages)):
+        pages_read += 1
+        for piece in splitter.split_text(reader.pages[page_index].extract_text() or ""):
+            chunks.append((pages_read, piece))
+            if len(chunks) >= max_chunks:
+                return chunks, pages_read
+    return chunks, pages_read
+
+
+@dataclass
+class SessionDocument:
+    doc_id: str
+    owner: str
+    name: str
+    chunks: list
+    vectors: np.ndarray  # unit rows, float32
+    last_used: float = field(default_factory=time.time)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes + sum(len(text) for _, text in self.chunks)
+
+
+class SessionDocStore:
+    def __init__(self, max_docs_per_user=3, max_bytes=256 * 1024 * 1024, idle_ttl_s=1800.0):
+        self.max_docs_per_user = max_docs_per_user
+        self.max_bytes = max_bytes
+        self.idle_ttl_s = idle_ttl_s
+        self._docs: "OrderedDict[str, SessionDocument]" = OrderedDict()  # LRU order
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id)
+        self._bytes -= doc.nbytes
+        self.evicted += 1
+
+    def _evict(self):
+        cutoff = time.time() - self.idle_ttl_s
+        for doc_id in [d.doc_id for d in self._docs.values() if d.last_used < cutoff]:
+            self._remove(doc_id)
+        while self._docs and self._bytes > self.max_bytes:
+            self._remove(next(iter(self._docs)))
+
+    def add(self, owner: str, name: str, chunks, vectors) -> str:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        doc = SessionDocument(secrets.token_urlsafe(12), owner, name, list(chunks), vectors)
+        with self._lock:
+            owned = [d.doc_id for d in self._docs.values() if d.owner == owner]
+            for doc_id in owned[:max(0, len(owned) - self.max_docs_per_user + 1)]:
+                self._remove(doc_id)  # user's least recently used uploads go first
+            self._docs[doc.doc_id] = doc
+            self._bytes += doc.nbytes
+            self._evict()
+        return doc.doc_id
+
+    def touch(self, owner: str, doc_id: str) -> SessionDocument:
+        with self._lock:
+            self._evict()
+            doc = self._docs.get(doc_id)
+            if doc is None or doc.owner != owner:
+                raise DocumentNotFound(doc_id)
+            doc.last_used = time.time()
+            self._docs.move_to_end(doc_id)
+            return doc
+
+    def search(self, owner: str, doc_id: str, query_vector, k: int = 2):
+        doc = self.touch(owner, doc_id)
+        if not doc.chunks:
+            return []
+        q = np.asarray(query_vector, dtype=np.float32)
+        scores = doc.vectors @ (q / max(np.linalg.norm(q), 1e-12))
+        top = np.argsort(-scores)[:k]
+        return [Document(page_content=doc.chunks[i][1],
+                         metadata={"source": doc.name, "page": doc.chunks[i][0], "uploaded": True})
+                for i in top]
+
+    def stats(self) -> dict:
+        return {"documents": len(self._docs), "bytes": self._bytes, "evicted": self.evicted}
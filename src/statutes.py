@@ -0,0 +1,60 @@
+import os
+import re
+
+# --- 📚 STATUTE LIBRARY METADATA ---
+# PDF file name -> kaunsa act hai. Ingestion har chunk par act/page/section tag lagati hai.
+
+ACTS = {
+    "bns": "BNS 2023",
+    "bns_2023": "BNS 2023",
+    "ipc": "IPC 1860",
+    "constitution": "Constitution of India",
+    "human_rights": "Protection of Human Rights Act 1993",
+}
+
+# Constitution mein "Article" hota hai, baaki acts mein "Section".
+UNIT_BY_ACT = {"Constitution of India": "Article"}
+
+# Bare-act headings start a line: "303. Theft.—" / "106. (1) Whoever ..." / "21A. Right to education"
+SECTION_HEADING_RE = re.compile(r"^\s*(\d{1,3}[A-Z]?)\.\s*(?:\(\d+\)\s*)?[A-Z—(]", re.MULTILINE)
+
+
+def act_for_file(path: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0].lower()
+    return ACTS.get(stem, stem.replace("_", " ").title())
+
+
+def section_headings(text: str):
+    """Section numbers whose headings appear in this text, in order."""
+    return SECTION_HEADING_RE.findall(text)
+
+
+# --- 🔎 SECTION REFERENCES IN USER QUERIES ---
+# "section 318", "sec. 420 of ipc", "IPC 420", "BNS s. 103", "article 21"
+ACT_ALIASES = {
+    "bns": "BNS 2023",
+    "bharatiya nyaya sanhita": "BNS 2023",
+    "ipc": "IPC 1860",
+    "indian penal code": "IPC 1860",
+    "constitution": "Constitution of India",
+    "human rights act": "Protection of Human Rights Act 1993",
+}
+_ALIAS_PATTERN = "|".join(sorted((re.escape(a) for a in ACT_ALIASES), key=len, reverse=True))
+_UNIT_REF_RE = re.compile(r"\b(section|sec\.?|s\.|article|art\.?)\s*(\d{1,3}[a-z]?)\b", re.IGNORECASE)
+_ACT_REF_RE = re.compile(rf"\b({_ALIAS_PATTERN})\s*(?:section|sec\.?|s\.)?\s*(\d{{1,3}}[a-z]?)\b", re.IGNORECASE)
+_ACT_MENTION_RE = re.compile(rf"\b({_ALIAS_PATTERN})\b", re.IGNORECASE)
+
+
+def parse_section_refs(query: str):
+    """[(act_or_None, number, span)] for every section/article reference in the query."""
+    refs = []
+    for m in _ACT_REF_RE.finditer(query):
+        refs.append((ACT_ALIASES[m.group(1).lower()], m.group(2).upper(), m.span()))
+    mentioned = _ACT_MENTION_RE.search(query)
+    default_act = ACT_ALIASES[mentioned.group(1).lower()] if mentioned else None
+    for m in _UNIT_REF_RE.finditer(query):
+        if any(start <= m.start() < end for _, _, (start, end) in refs):
+            continue
+        act = "Constitution of India" if m.group(1).lower().startswith("art") else default_act
+        refs.append((act, m.group(2).upper(), m.span()))
+    return refs
@@ -0,0 +1,231 @@
+import bisect
+import contextvars
+import os
+import random
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+# --- 📊 HOT-PATH TELEMETRY ---
+# Har request ke stages (intent, embed, bm25, chroma, llm_prefill, ...) ka time
+# ek contextvar mein jama hota hai -> Server-Timing header + /metrics histograms.
+# Prometheus text format yahin likha hai, koi extra dependency nahi.
+
+_spans = contextvars.ContextVar("judicial_spans", default=None)
+
+
+class Counter:
+    def __init__(self, name, help_text, label):
+        self.name, self.help, self.label = name, help_text, label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value, amount=1.0):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for value, total in values:
+            lines.append(f'{self.name}{{{self.label}="{value}"}} {total}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label, buckets):
+        self.name, self.help, self.label = name, help_text, label
+        self.buckets = list(buckets)
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.setdefault(label_value, [0] * len(self.buckets) + [0.0, 0])
+            bucket = bisect.bisect_left(self.buckets, seconds)
+            if bucket < len(self.buckets):  # beyond the last bound -> only +Inf
+                series[bucket] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for value, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{self.label}="{value}",le="+Inf"}} {series[-1]}')
+                lines.append(f'{self.name}_sum{{{self.label}="{value}"}} {series[-2]:.6f}')
+                lines.append(f'{self.name}_count{{{self.label}="{value}"}} {series[-1]}')
+        return lines
+
+
+_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGE_SECONDS = Histogram("judicial_stage_seconds", "Time spent per hot-path stage.", "stage", _LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("judicial_request_seconds", "End-to-end HTTP request time.", "path", _LATENCY_BUCKETS)
+CHAT_ROUTES = Counter("judicial_chat_route_total", "How chat requests were answered.", "route")
+LLM_TOKENS = Counter("judicial_llm_tokens_total", "Tokens processed by the LLM.", "kind")
+ERRORS = Counter("judicial_errors_total", "Errors by exception class.", "error")
+RESPONSES = Counter("judicial_responses_total", "HTTP responses by status code.", "status")
+_gauges = []  # (name, help, fn)
+
+
+def gauge(name, help_text, fn):
+    """Registers a gauge whose value is read from fn() at scrape time."""
+    _gauges.append((name, help_text, fn))
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, CHAT_ROUTES, LLM_TOKENS, ERRORS, RESPONSES):
+        lines.extend(metric.render())
+    for name, help_text, fn in _gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {fn()}"]
+    return "\n".join(lines) + "\n"
+
+
+# --- ⏱️ SPANS ---
+def record(stage: str, seconds: float):
+    """Adds a stage timing to the current request (if any) and to the stage histogram."""
+    STAGE_SECONDS.observe(stage, seconds)
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started_at)
+
+
+def record_llm_metadata(metadata: dict):
+    """Ollama reports its own prefill / generation split (nanoseconds) on the final message."""
+    for key, stage in (("load_duration", "llm_load"), ("prompt_eval_duration", "llm_prefill"),
+                       ("eval_duration", "llm_generate")):
+        if metadata.get(key):
+            record(stage, metadata[key] / 1e9)
+    if metadata.get("prompt_eval_count"):
+        LLM_TOKENS.inc("prompt", metadata["prompt_eval_count"])
+    if metadata.get("eval_count"):
+        LLM_TOKENS.inc("generated", metadata["eval_count"])
+
+
+def _totals(spans):
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return totals
+
+
+def server_timing_header(spans) -> str:
+    return ", ".join(f"{stage};dur={1000 * seconds:.2f}" for stage, seconds in _totals(spans).items())
+
+
+def current_timings() -> dict:
+    """{stage: ms} for the current request so far (streams send this in their last event)."""
+    return {stage: round(1000 * seconds, 2) for stage, seconds in _totals(_spans.get() or []).items()}
+
+
+# --- 🧯 ERROR CLASSES ---
+def classify_error(exc: Exception) -> str:
+    """Coarse error class for metrics and client messages. Matches on class names so the
+    Ollama / httpx / Chroma exception types need not be imported here."""
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & {"ConnectError", "ConnectionError"}:
+        return "llm_unreachable"
+    if names & {"TimeoutError", "TimeoutException"}:
+        return "timeout"
+    if "ResponseError" in names:  # ollama.ResponseError: model missing, bad request, OOM
+        return "llm_error"
+    if "ChromaError" in names:
+        return "vault_error"
+    return type(exc).__name__
+
+
+# --- 🔬 OPTIONAL SAMPLING PROFILER (pyinstrument) ---
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+
+def _start_profiler():
+    if Profiler is None or PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE:
+        return None
+    profiler = Profiler(async_mode="enabled")
+    profiler.start()
+    return profiler
+
+
+def _finish_profiler(profiler, path, seconds):
+    profiler.stop()
+    if 1000 * seconds < PROFILE_SLOW_MS:
+        return  # fast request -> sample discarded
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{path.strip('/').replace('/', '_') or 'root'}-{int(1000 * seconds)}ms.html"
+    with open(os.path.join(PROFILE_DIR, name), "w") as f:
+        f.write(profiler.output_html())
+
+
+# --- 🧩 ASGI MIDDLEWARE ---
+class TelemetryMiddleware:
+    """Collects spans per request, adds a Server-Timing header and records request latency.
+    Plain ASGI (not BaseHTTPMiddleware) so SSE streaming and disconnect detection are untouched.
+    Spans finished after the headers go out (streamed tokens) still reach /metrics.
+    Unhandled exceptions are turned into error_response(error_class) here, so they get counted
+    and timed like any other response."""
+
+    def __init__(self, app, error_response=None):
+        self.app = app
+        self.error_response = error_response
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        spans = []
+        token = _spans.set(spans)
+        started_at = time.perf_counter()
+        profiler = _start_profiler()
+
+        response_started = False
+
+        async def send_with_timing(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                RESPONSES.inc(str(message["status"]))
+            if message["type"] == "http.response.start" and spans:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing_header(spans).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        except Exception as e:
+            error = classify_error(e)
+            ERRORS.inc(error)
+            if response_started or self.error_response is None:
+                raise  # mid-stream: nothing left to send but a dropped connection
+            traceback.print_exception(e)
+            await self.error_response(error)(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(getattr(route, "path", None) or "unmatched", elapsed)
+            if profiler is not None:
+                _finish_profiler(profiler, scope["path"], elapsed)
+            _spans.reset(token)
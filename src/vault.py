@@ -0,0 +1,66 @@
+import os
+import time
+
+# --- 🏛️ JUDICIAL VAULT (Chroma collection) LOCATION + VERSION ---
+# Har re-ingest ke baad version badalta hai, taaki caches aur in-memory
+# indexes ko pata chale ki purana data ab valid nahi hai.
+VAULT_DIR = os.getenv("JUDICIAL_VAULT_DIR", "src/vectorstore")
+COLLECTION_NAME = "judicial_vault"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Chunking used for the vault and for uploaded documents.
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+VERSION_FILE = os.path.join(VAULT_DIR, "vault.version")
+
+
+def read_vault_version() -> str:
+    try:
+        with open(VERSION_FILE) as f:
+            return f.read().strip() or "0"
+    except FileNotFoundError:
+        return "0"
+
+
+def bump_vault_version() -> str:
+    """Called by ingestion after the collection changes. Returns the new version."""
+    version = str(time.time_ns())
+    tmp_path = VERSION_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, VERSION_FILE)
+    return version
+
+
+class VaultVersionWatcher:
+    """Cheap change detector: one stat() per call, file is only re-read when its mtime moves."""
+
+    def __init__(self):
+        self._mtime = None
+        self._pending_mtime = None
+        self.version = read_vault_version()
+
+    def pending(self):
+        """New version if the vault moved, else None. Does not advance -- call commit() once the
+        caller has actually caught up, so a failed rebuild is retried on the next call."""
+        try:
+            mtime = os.stat(VERSION_FILE).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return None
+        version = read_vault_version()
+        if version == self.version:
+            self._mtime = mtime
+            return None
+        self._pending_mtime = mtime
+        return version
+
+    def commit(self, version: str):
+        self._mtime, self.version = self._pending_mtime, version
+
+    def changed(self) -> bool:
+        version = self.pending()
+        if version is None:
+            return False
+        self.commit(version)
+        return True